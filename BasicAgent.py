@@ -1,7 +1,12 @@
 import Environment
 import numpy as np
 import random
+import CellPool
 import Clue
+import Guesser
+import KnowledgeBase
+import Stats
+import Trace
 
 
 # newEnvironment = minesweeperVScode.Environment # Load original environment -> used to compare with moves and update
@@ -32,44 +37,95 @@ class BasicAgent():
             the remaining cells.
     """
 
-    def __init__(self, height=50, width=50):
+    def __init__(self, height=50, width=50, mines=None, guessing="uniform", trace=None,
+                 seed=None, stats=False, sparse=False):
 
         # Initialize the dimensions of the board,set the height and width
         self.height = height
         self.width = width
+        self.mines = mines  # total number of mines on the board, if it is known
 
-        self.track_moves = set()  # Keep a track of the moves which have been made
-        self.total_cells = set()  # as well as a set of all board cells -> total cells
+        # How to pick a cell when no safe move is known: "uniform" at random, or "probability" for the cell least likely
+        # to be a mine (see Guesser.ProbabilityGuesser)
+        self.guesser = Guesser.ProbabilityGuesser() if guessing == "probability" else None
+
+        # Where moves are reported, see Trace.Tracer; tracing is off unless a tracer is given
+        self.trace = trace or Trace.Tracer()
+
+        # Random moves are drawn from the agent's own random number generator, so a seed reproduces them
+        self.rng = random.Random(seed)
+
+        # Counters of the work done in this game and time per phase (see Stats.AgentStats), None unless stats=True
+        self.stats = None
+        if stats:
+            self.stats = Stats.AgentStats()
+            self.stats.attach(self)
 
-        for x in range(height):
-            for y in range(width):
-                self.total_cells.add((x, y))  # adds all locations (x,y) into all cells
+        self.track_moves = set()  # Keep a track of the moves which have been made
+        # as well as a pool of the board cells that are still available to move to: not revealed and not known to be
+        # mines. It is updated as cells are revealed or flagged, so a random move needs no set difference. For very
+        # large boards, sparse=True stores only the cells that left the pool instead, see CellPool.SparseCellPool
+        if sparse:
+            self.availableCells = CellPool.SparseCellPool(height, width, self.rng)
+        else:
+            self.availableCells = CellPool.CellPool(((x, y) for x in range(height) for y in range(width)), self.rng)
 
         self.mineSet = set()  # keep a track of the board cells known to be mines
         self.safeSet = set()  # keep a track of the board cells known to be safes
 
-        # List of clues (set of cells and count of how many are mines)
-        self.knowledgeBase = []
+        # Clues (set of cells and count of how many are mines), without duplicates and indexed by cell
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase()
         # Example knowledge base: [((set of cells) = count), ((set2 of cells) = count), ((set3 of cells) = count)]
 
+        # Clues that were added or changed since the knowledge base was last simplified, in the order they were added.
+        # A clue that did not change cannot have become fully safe or fully mined, so only these are gone through
+        self.pendingClues = {}
+
     def MarkMine(self, cell):
         """
         Add the cell to the set of board cells known to be mines.
         For each clue in the knowledge base, mark the cell as a mine as well.
         This updates the cell as a mine in the total knowledge base.
+        Returns the updated clues that replaced the clues containing the cell.
         """
+        if self.stats is not None:
+            self.stats.markMine += 1
         self.mineSet.add(cell)
-        for clue in self.knowledgeBase:
-            clue.MarkMine(cell)
+        self.availableCells.discard(cell)
+        # Only the clues that contain the cell are affected; each is replaced by the clue without the cell
+        updated = []
+        for clue in self.knowledgeBase.cluesWith(cell):
+            self.knowledgeBase.remove(clue)
+            updated.append(clue.WithMine(cell))
+            self.addClue(updated[-1])
+        return updated
 
     def MarkSafe(self, cell):
         """
         Add the cell to the set of board cells known to be safes.
         For each clue in the knowledge base, mark the cell as a safe as well.
         This updates the cell as a safe in the total knowledge base.
+        Returns the updated clues that replaced the clues containing the cell.
+        """
+        if self.stats is not None:
+            self.stats.markSafe += 1
+        # Only the clues that contain the cell are affected; each is replaced by the clue without the cell
+        updated = []
+        for clue in self.knowledgeBase.cluesWith(cell):
+            self.knowledgeBase.remove(clue)
+            updated.append(clue.WithSafe(cell))
+            self.addClue(updated[-1])
+        return updated
+
+    def addClue(self, clue):
         """
-        for clue in self.knowledgeBase:
-            clue.MarkSafe(cell)
+        Add a clue to the knowledge base and to the clues to go through when it is next simplified, unless an equal
+        clue is already there
+        """
+        if self.knowledgeBase.add(clue):
+            self.pendingClues[clue] = None
+        elif self.stats is not None:
+            self.stats.duplicates += 1
 
     def add_knowledge(self, cell, count):
         """
@@ -82,11 +138,15 @@ class BasicAgent():
 
         # add cell to list of moves that have been made
         self.track_moves.add(cell)
+        self.availableCells.discard(cell)
+        # a cell revealed along with others (see add_knowledge_batch) may already be a pending safe move
+        self.safeSet.discard(cell)
 
         # add cell to list of safe cells
         self.MarkSafe(cell)
 
         updatedKnowledgeBase = []
+        minesAround = 0  # neighbours already known to be mines
         # parse through the neighbors/surrounding cells of the current cell
         for i in range(cell[0] - 1, cell[0] + 2):
             for j in range(cell[1] - 1, cell[1] + 2):
@@ -97,33 +157,45 @@ class BasicAgent():
 
                 # If the cell is within board dimensions, and is identified to be a mine, add it as a new knowledge
                 if 0 <= i < self.height and 0 <= j < self.width:  # in bounds
-                    if (i, j) not in self.track_moves and (i, j) not in self.safeSet:
+                    if (i, j) in self.mineSet:
+                        # a known mine is left out of the clue and counted off, so the clue is only about hidden cells
+                        minesAround += 1
+                    elif (i, j) not in self.track_moves and (i, j) not in self.safeSet:
                         updatedKnowledgeBase.append((i, j))
                         # for a given move, check if cell location is in set of moves_made or in set of safes
 
         # add the new Knowledge to the knowledge base, calling the Clue class
         if len(updatedKnowledgeBase) != 0:
-            self.knowledgeBase.append(Clue.Clue(updatedKnowledgeBase, count))
+            clueCount = count - minesAround
+            self.addClue(Clue.Clue(updatedKnowledgeBase, clueCount))
 
         while self.SimplifyKnowledgeBase() != self.knowledgeBase:
             pass
 
+        # Report the move; nothing is formatted unless tracing is on
+        if self.trace.level >= Trace.SUMMARY:
+            self.traceMove(cell, count)
+
+    def traceMove(self, cell, count):
         """
-        Print a text based representation of the sets for easy user viewing within the terminal
-        USE FOR TESTING OUTPUTS!!
+        Report a move to the tracer: a one line summary, or at the EVENTS level the full knowledge base and the safe and
+        mine cells as a structured event
         """
-        print("\n\n\n\n")
-        print("------------------------------------------------------------------")
-        print("\nCurrent move made: ", cell)
-        print("Current Knowledge Base: ")
-        for clue in self.knowledgeBase:
-            print(clue)
-        print("\nConfirmed Safe Cells: ")
-        print(self.safeSet)
+        if self.trace.level >= Trace.EVENTS:
+            self.trace.event("move", agent=type(self).__name__, cell=cell, count=count,
+                             knowledgeBase=Trace.clues(self.knowledgeBase), safe=sorted(self.safeSet),
+                             mines=sorted(self.mineSet))
+        else:
+            self.trace.summary(f"Move {cell}: {count} neighbouring mines, {len(self.knowledgeBase)} clues, "
+                               f"{len(self.safeSet)} safe, {len(self.mineSet)} mines")
 
-        print("\nConfirmed Mine Cells: ")
-        print(self.mineSet)
-        print("------------------------------------------------------------------")
+    def add_knowledge_batch(self, observations):
+        """
+        Add the knowledge of several revealed cells at once, e.g. the (cell, count) pairs returned by
+        Environment.reveal when a zero clue opens up a region of the board
+        """
+        for cell, count in observations:
+            self.add_knowledge(cell, count)
 
     def move_safely(self):
         """
@@ -133,32 +205,38 @@ class BasicAgent():
         if len(self.safeSet) > 0:
             return self.safeSet.pop()
         else:
-            print("No safe moves to be made :(")
+            if self.trace.level >= Trace.SUMMARY:
+                self.trace.summary("No safe moves to be made :(")
             return None
 
     def move_randomly(self):
         """
-        Picks a random move from the set of moves that are available to make (total board cells - moves that have
+        Picks a random move from the pool of moves that are available to make (total board cells - moves that have
         already been made - moves that have been identified as mines). If there is not a random move, available moves ≤ 0
         to be made the function does not return anything
+        With probability guessing the move is instead the available cell least likely to be a mine
         """
-        availableMoves = self.total_cells - self.track_moves - self.mineSet  # makes a move that has not already been made and is known to not be a mine
-        if len(availableMoves) > 0:
-            return random.choice(tuple(availableMoves))
-        else:
-            return None
+        if self.guesser is not None:
+            return self.guesser.guess(self)
+        # makes a move that has not already been made and is known to not be a mine, None if the pool is empty
+        return self.availableCells.choice()
 
     def SimplifyKnowledgeBase(self):
         """
-        Make a copy of the current knowledge base and iterate through each clue. For each clue, retrieve the known safes
+        Iterate through each clue that was added or changed since the last call. For each clue, retrieve the known safes
         & known mines. Iterate through each set, and update it with the union of both and remove it from the knowledge
         base.
+        Only the neighbourhood of the last move is gone through: the clues of the revealed cell and the clues that
+        contain it. Marking a mine extends the pass with the clues that contain the mine, so the region searched only
+        grows while new mines are found, and the cost of a move does not depend on the size of the knowledge base.
         """
 
-        # make a copy of the current knowledge base
-        GoThroughClues = self.knowledgeBase.copy()
+        # the clues to go through, which stay unchanged as the knowledge base is updated
+        GoThroughClues = list(self.pendingClues)
 
-        for clue in GoThroughClues:  # Queries all the clues in the knowledge base
+        for clue in GoThroughClues:  # Queries the clues that changed
+            if clue not in self.knowledgeBase:
+                continue  # already replaced or removed while simplifying an earlier clue
             # call known_safes function from the Clue class, returns set of safe cells and stores in known_safes
             SafesQueried = clue.SafesKnown()
             # call known_mines function from the Clue class, returns set of mine cells and stores in known_mines
@@ -170,10 +248,16 @@ class BasicAgent():
 
             if MinesQueried:
                 self.knowledgeBase.remove(clue)  # remove clue from knowledge base
-                for mine in MinesQueried.union(self.mineSet):
-                    # if there is an overlap between known_mines and self.mines, mark the mine
-                    self.MarkMine(mine)
-
+                for mine in MinesQueried:
+                    # if there is an overlap between known_mines and self.mines, mark the mine, and go through the
+                    # updated clues in this pass as well
+                    GoThroughClues.extend(self.MarkMine(mine))
+
+        # every clue added or changed during this pass was gone through as well
+        self.pendingClues = {}
+        if self.stats is not None:
+            self.stats.fixpointIterations += 1
+            self.stats.cluesExamined += len(GoThroughClues)
         return self.knowledgeBase
 
     def FlagCells(self):
@@ -0,0 +1,427 @@
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import Environment
+import Simulation
+import Stats
+
+# Boards benchmarked by default, named columns x rows / mines like the usual beginner, intermediate and expert boards,
+# with their (height, width, mines)
+PRESETS = {
+    "10x10/15": (10, 10, 15),
+    "16x16/40": (16, 16, 40),
+    "30x16/99": (16, 30, 99),
+    "50x50/100": (50, 50, 100),
+    "100x100/1000": (100, 100, 1000),
+}
+
+# Measurements compared against a baseline, all of them lower is better, with the smallest change that counts as a
+# regression whatever the relative threshold. The floors keep timer noise on tiny values from being reported; the run to
+# run noise of larger values is measured instead (see combine)
+METRICS = [
+    (("game_ms", "mean"), 0.5),
+    (("move_ms", "p50"), 0.02),
+    (("move_ms", "p99"), 0.5),
+    (("peak_kib", "max"), 16),
+]
+PHASE_METRICS = [("total_ms", 5.0), ("peak_kib", 16)]
+
+# Whether tracemalloc can reset its peak, which measuring the peak memory of each phase needs (Python 3.9 and later).
+# Without it only the peak memory of whole games is measured
+PHASE_PEAKS = hasattr(tracemalloc, "reset_peak")
+
+
+class Phases():
+    """
+    Measures the time, and optionally the peak memory, that an agent spends in each of its phases.
+    The phases are the methods in Stats.PHASES, wrapped with Stats.wrapPhases. Phases nest, e.g. newInferences runs
+    inside add_knowledge_batch, and the time and memory of a phase include those of the phases it calls.
+    Memory is measured with tracemalloc, which must be tracing, and which slows the agent down, so time and memory are
+    measured in separate runs of the same games. Tracing is started afresh for every game, so the peak of a game needs
+    no reset; the peaks of the phases are only measured where tracemalloc can reset its peak (see PHASE_PEAKS).
+    """
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.calls = {}  # phase -> duration of every call, in seconds
+        self.peaks = {}  # phase -> largest peak of a call above the memory in use when it started, in bytes
+        self.stack = []  # [memory at the start, peak so far] of the game and of the phases that are running
+
+    def attach(self, agent):
+        if self.memory and not PHASE_PEAKS:
+            return
+        Stats.wrapPhases(agent, self.wrap)
+
+    def wrap(self, name, method):
+        calls = self.calls.setdefault(name, [])
+
+        if not self.memory:
+            return Stats.timed(method, calls.append)
+
+        def traced(*args, **kwargs):
+            self.enter()
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                calls.append(time.perf_counter() - start)
+                self.peaks[name] = max(self.peaks.get(name, 0), self.exit())
+        return traced
+
+    def enter(self):
+        # tracemalloc keeps a single peak, so the phases already running take theirs before it is reset for this one
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self.stack:
+            frame[1] = max(frame[1], peak)
+        if PHASE_PEAKS:
+            tracemalloc.reset_peak()
+        self.stack.append([current, current])
+
+    def exit(self):
+        """
+        Returns the peak memory of the phase that ends above the memory in use when it started, in bytes
+        """
+        frame = self.stack.pop()
+        frame[1] = max(frame[1], tracemalloc.get_traced_memory()[1])
+        if self.stack:
+            self.stack[-1][1] = max(self.stack[-1][1], frame[1])
+        return frame[1] - frame[0]
+
+    def start(self):
+        """
+        Start measuring a game, before its agent is created
+        """
+        if self.memory:
+            tracemalloc.start()
+            self.enter()
+
+    def stop(self):
+        """
+        Returns the peak memory of the game in bytes, or None when memory is not measured
+        """
+        if not self.memory:
+            return None
+        try:
+            return self.exit()
+        finally:
+            tracemalloc.stop()
+
+
+def play(agent_class, height, width, mines, seed, environment_class, agent_options, phases):
+    """
+    Plays one game like Simulation.play_game, measuring the agent as it goes. Returns whether it was won, the time the
+    agent took for each move (choosing it and taking in what it revealed, not the environment's own work), the number
+    of clues in the knowledge base after each move, and the peak memory of the game when it is measured
+    """
+    boardSeed, agentSeed = Simulation.game_seeds(seed)
+    game = environment_class(height=height, width=width, mines=mines, seed=boardSeed)
+    phases.start()
+    ai = agent_class(height=height, width=width, mines=mines, seed=agentSeed, **(agent_options or {}))
+    phases.attach(ai)
+
+    latencies = []
+    sizes = []
+    while game.status() == Environment.IN_PROGRESS:
+        start = time.perf_counter()
+        move = ai.move_safely()
+        if move is None:
+            move = ai.move_randomly()
+            if move is None:
+                break  # no moves left to make
+        chosen = time.perf_counter()
+
+        if game.is_mine(move):
+            game.reveal(move)
+            start = time.perf_counter() - (chosen - start)
+            ai.MarkMine(move)
+        else:
+            observations = game.reveal(move)
+            start = time.perf_counter() - (chosen - start)
+            ai.add_knowledge_batch(observations)
+        latencies.append(time.perf_counter() - start)
+        sizes.append(len(ai.knowledgeBase))
+
+    return game.status() == Environment.WON, latencies, sizes, phases.stop()
+
+
+def percentile(values, fraction):
+    """
+    Returns the smallest value that is at least as large as the given fraction of the values
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] if ordered else 0.0
+
+
+def curve(sizes, points=10):
+    """
+    Returns the sizes at 1/points, 2/points, ... of the way through a game
+    """
+    return [sizes[max(0, math.ceil(len(sizes) * i / points) - 1)] if sizes else 0 for i in range(1, points + 1)]
+
+
+def reference(size=60):
+    """
+    Times a fixed piece of work made of the same kind of set and tuple operations as the agents', which does not depend
+    on the code being benchmarked, one row of a size x size grid at a time. Returns the time of every row, in seconds.
+    The times measured are compared against a baseline relative to it, since a machine can run at a different speed
+    from one run to the next
+    """
+    times = []
+    known = set()
+    for i in range(size):
+        start = time.perf_counter()
+        for j in range(size):
+            cells = frozenset((i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)
+                              if (di or dj) and 0 <= i + di < size and 0 <= j + dj < size)
+            known |= cells - known if (i + j) % 2 else cells & known
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def fastest(runs):
+    """
+    Returns the smallest time of each position over several runs of the same timed steps
+    """
+    return [min(times) for times in zip(*runs)]
+
+
+def measure(agent_class, height, width, mines, games=20, seed=0, environment_class=Environment.Environment,
+            agent_options=None, memory_games=3, repeats=5):
+    """
+    Benchmarks one agent on one board size: games timed games with seeds seed, seed + 1, ..., played repeats times,
+    then the first memory_games of them again with tracemalloc to find the peak memory. The seeded games are played
+    the same way every time, so each move and each call of a phase is timed as the fastest of the repeats, since noise
+    only ever makes a step slower; the reference work runs before every game and after the last one, and is timed
+    the same way. Returns a dictionary of measurements, with times in milliseconds and memory in KiB.
+    """
+    # an untimed game first, so that the first timed game does not pay for warming up the interpreter's caches
+    play(agent_class, height, width, mines, seed, environment_class, agent_options, Phases())
+
+    references = []
+    runs = []  # the time of every move of every game, in each repeat
+    calls = {}  # phase -> the time of every call, in each repeat
+    for repeat in range(repeats):
+        phases = Phases()
+        wins = 0
+        latencies = []
+        sizes = []
+        curves = []
+        for i in range(games):
+            references.append(reference())
+            won, moves, kb, _ = play(agent_class, height, width, mines, seed + i, environment_class, agent_options,
+                                     phases)
+            wins += won
+            latencies.append(moves)
+            sizes.extend(kb)
+            curves.append(curve(kb))
+        runs.append(latencies)
+        for name, times in phases.calls.items():
+            calls.setdefault(name, []).append(times)
+    references.append(reference())
+
+    gameMoves = [fastest(moves) for moves in zip(*runs)]
+    gameTimes = [sum(moves) for moves in gameMoves]
+    latencies = [latency for moves in gameMoves for latency in moves]
+    totalTime = sum(gameTimes)
+    phaseResults = {}
+    for name, times in calls.items():
+        times = fastest(times)
+        if not times:
+            continue
+        phaseResults[name] = {
+            "calls": len(times),
+            "total_ms": sum(times) * 1000,
+            "share": sum(times) / totalTime if totalTime else 0.0,
+            "p50_ms": percentile(times, 0.5) * 1000,
+            "p99_ms": percentile(times, 0.99) * 1000,
+        }
+
+    memory = Phases(memory=True)
+    peaks = []
+    for i in range(min(games, memory_games)):
+        peaks.append(play(agent_class, height, width, mines, seed + i, environment_class, agent_options, memory)[3])
+    for name, phase in phaseResults.items():
+        phase["peak_kib"] = memory.peaks[name] / 1024 if name in memory.peaks else None
+
+    return {
+        "games": games,
+        "repeats": repeats,
+        "reference_ms": sum(fastest(references)) * 1000,
+        "wins": wins,
+        "moves": len(latencies),
+        "game_ms": {"mean": totalTime / games * 1000 if games else 0.0, "max": max(gameTimes, default=0.0) * 1000},
+        "move_ms": {name: percentile(latencies, fraction) * 1000
+                    for name, fraction in [("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)]},
+        "kb": {
+            "mean": sum(sizes) / len(sizes) if sizes else 0.0,
+            "max": max(sizes, default=0),
+            "curve": [sum(points) / len(curves) for points in zip(*curves)],
+        },
+        "peak_kib": {"mean": sum(peaks) / len(peaks) / 1024 if peaks else 0.0, "max": max(peaks, default=0) / 1024},
+        "phases": phaseResults,
+    }
+
+
+def checks(result):
+    """
+    Returns (metric, path, floor) for every measurement of a result that is compared against a baseline
+    """
+    found = [(".".join(path), path, floor) for path, floor in METRICS]
+    for phase in result["phases"]:
+        for key, floor in PHASE_METRICS:
+            found.append((f"{phase}.{key}", ("phases", phase, key), floor))
+    return found
+
+
+def combine(runs):
+    """
+    Combines the results of several runs of measure for the same agent and board size into one. Every measurement
+    compared against a baseline is the median over the runs, with the times first scaled to the median speed of the
+    reference work, and result["noise"] holds how far the runs spread for each of them, (largest - smallest) / median.
+    The other measurements are those of the first run
+    """
+    result = json.loads(json.dumps(runs[0]))
+    result["runs"] = len(runs)
+    result["reference_ms"] = statistics.median(run["reference_ms"] for run in runs)
+    result["noise"] = {}
+    for metric, path, floor in checks(result):
+        values = [get(run, path) for run in runs]
+        if None in values:
+            continue
+        if "_ms" in metric:
+            values = [value * result["reference_ms"] / run["reference_ms"] for value, run in zip(values, runs)]
+        middle = statistics.median(values)
+        put(result, path, middle)
+        result["noise"][metric] = (max(values) - min(values)) / middle if middle else 0.0
+    return result
+
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Returns a list of (agent, preset, metric, baseline value, current value) for every measurement that grew by more
+    than threshold (a fraction) plus its noise over the baseline, and a list of (agent, preset) whose games were not won
+    the same number of times, which means the agent plays differently on the same boards. The noise of a measurement is
+    the larger of its spreads over the runs of the baseline and of the current results (see combine), so a measurement
+    that varies a lot from run to run needs to grow more to count. The baseline's times are scaled by how much slower
+    or faster the reference work ran this time (see reference) before they are compared
+    """
+    regressions = []
+    changed = []
+    for agent, presets in results.items():
+        for preset, current in presets.items():
+            base = baseline.get(agent, {}).get(preset)
+            if base is None:
+                continue
+            if base["games"] == current["games"] and base["wins"] != current["wins"]:
+                changed.append((agent, preset))
+
+            speed = current["reference_ms"] / base["reference_ms"] if base.get("reference_ms") else 1.0
+            for metric, path, floor in checks(current):
+                old, new = get(base, path), get(current, path)
+                if old is not None and "_ms" in metric:
+                    old *= speed
+                noise = max(base.get("noise", {}).get(metric, 0.0), current.get("noise", {}).get(metric, 0.0))
+                if old is not None and new is not None and new > old * (1 + threshold + noise) and new - old > floor:
+                    regressions.append((agent, preset, metric, old, new))
+    return regressions, changed
+
+
+def get(results, path):
+    for key in path:
+        if not isinstance(results, dict) or key not in results:
+            return None
+        results = results[key]
+    return results
+
+
+def put(results, path, value):
+    for key in path[:-1]:
+        results = results[key]
+    results[path[-1]] = value
+
+
+def report(agent, preset, result):
+    print(f"{agent} {preset}: {result['games']} games, {result['wins']} won, {result['game_ms']['mean']:.2f} ms/game, "
+          f"move p50 {result['move_ms']['p50']:.3f} ms p90 {result['move_ms']['p90']:.3f} ms "
+          f"p99 {result['move_ms']['p99']:.3f} ms max {result['move_ms']['max']:.3f} ms, "
+          f"KB mean {result['kb']['mean']:.1f} max {result['kb']['max']} clues, "
+          f"peak {result['peak_kib']['max']:.1f} KiB")
+    print("    KB size through the game: " + " ".join(f"{size:.0f}" for size in result["kb"]["curve"]))
+    for name, phase in sorted(result["phases"].items(), key=lambda item: -item[1]["total_ms"]):
+        print(f"    {name:<22} {phase['calls']:>8} calls {phase['total_ms']:>10.2f} ms {phase['share']:>6.1%}  "
+              f"p50 {phase['p50_ms']:.3f} ms  p99 {phase['p99_ms']:.3f} ms  " +
+              ("peak n/a" if phase["peak_kib"] is None else f"peak {phase['peak_kib']:.1f} KiB"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the agents on fixed seeded boards and check for regressions")
+    parser.add_argument("--agent", choices=sorted(Simulation.AGENTS) + ["all"], default="all")
+    parser.add_argument("--presets", default=",".join(PRESETS),
+                        help="comma separated board sizes to run, from " + ", ".join(PRESETS))
+    parser.add_argument("--games", type=int, default=20, help="timed games per agent and board size")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="timed passes over the games, the fastest time of each measurement is kept")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="times every agent and board size is measured, to take the median and the run to run "
+                             "noise of each measurement")
+    parser.add_argument("--memory-games", type=int, default=3,
+                        help="games replayed with tracemalloc to measure peak memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board", choices=sorted(Simulation.ENVIRONMENTS), default="list")
+    parser.add_argument("--sparse", action="store_true",
+                        help="keep no per cell state in the agents, for very large boards (use with --board bitmap)")
+    parser.add_argument("--output", default=None, help="write the results to this JSON file, e.g. to use as a baseline")
+    parser.add_argument("--baseline", default=None, help="compare against the results stored in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative growth over the baseline, on top of the measured noise, reported as a regression "
+                             "(default 0.25)")
+    args = parser.parse_args(argv)
+
+    presets = args.presets.split(",")
+    for preset in presets:
+        if preset not in PRESETS:
+            parser.error(f"unknown preset {preset!r}, choose from {', '.join(PRESETS)}")
+    agents = sorted(Simulation.AGENTS) if args.agent == "all" else [args.agent]
+
+    # The runs go round all the agents and board sizes in turn, so that a stretch of time the machine runs slower
+    # than usual does not fall on the runs of a single one
+    runs = {(agent, preset): [] for agent in agents for preset in presets}
+    for run in range(args.runs):
+        for (agent, preset), measured in runs.items():
+            height, width, mines = PRESETS[preset]
+            measured.append(measure(Simulation.AGENTS[agent], height, width, mines, args.games, args.seed,
+                                    Simulation.ENVIRONMENTS[args.board], {"sparse": True} if args.sparse else None,
+                                    args.memory_games, args.repeats))
+
+    results = {agent: {} for agent in agents}
+    for (agent, preset), measured in runs.items():
+        results[agent][preset] = combine(measured)
+        report(agent, preset, results[agent][preset])
+
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "seed": args.seed,
+                       "board": args.board, "sparse": args.sparse, "results": results}, stream, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as stream:
+            baseline = json.load(stream)
+        regressions, changed = compare(results, baseline["results"], args.threshold)
+        for agent, preset in changed:
+            print(f"NOTE {agent} {preset}: won a different number of games than the baseline on the same boards")
+        for agent, preset, metric, old, new in regressions:
+            print(f"REGRESSION {agent} {preset} {metric}: {old:.3f} -> {new:.3f} (+{new / old - 1:.0%})"
+                  if old else f"REGRESSION {agent} {preset} {metric}: {old:.3f} -> {new:.3f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+
+
+if __name__ == "__main__":
+    main()
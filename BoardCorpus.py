@@ -0,0 +1,107 @@
+import argparse
+
+import numpy as np
+
+import Environment
+
+# A corpus file starts with a 16 byte header: the magic bytes, then the number of boards and their height and width as
+# little endian 32 bit integers. It is followed by one record per board: the row major mine mask packed 8 cells to a
+# byte, padded to a whole byte.
+MAGIC = b"MSBC"
+HEADER = np.dtype([("magic", "S4"), ("boards", "<u4"), ("height", "<u4"), ("width", "<u4")])
+
+
+class BoardCorpus():
+    """
+    A fixed set of boards stored in a compact binary file, so that benchmarks can replay exactly the same games with
+    different agents, or different versions of an agent, without generating the boards again.
+    The file is memory-mapped, so opening a corpus of thousands of boards reads nothing but the header, and boards are
+    unpacked only when they are asked for, one at a time or in bulk.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a board corpus")
+        self.height = int(header["height"][0])
+        self.width = int(header["width"][0])
+        boards = int(header["boards"][0])
+        self.recordSize = (self.height * self.width + 7) // 8
+        if boards:
+            self.packed = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.itemsize,
+                                    shape=(boards, self.recordSize))
+        else:
+            self.packed = np.zeros((0, self.recordSize), dtype=np.uint8)  # an empty file region can not be mapped
+
+    def __len__(self):
+        return len(self.packed)
+
+    def __getitem__(self, index):
+        """
+        Returns the mine mask of one board, a 2D boolean NumPy array
+        """
+        cells = self.height * self.width
+        return np.unpackbits(self.packed[index], count=cells).astype(bool).reshape(self.height, self.width)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def masks(self, start=0, stop=None):
+        """
+        Returns the mine masks of boards start to stop as one 3D boolean array, unpacked in a single operation
+        """
+        cells = self.height * self.width
+        packed = self.packed[start:stop]
+        return np.unpackbits(packed, axis=1, count=cells).astype(bool).reshape(len(packed), self.height, self.width)
+
+    def game(self, index, environment_class=Environment.Environment):
+        """
+        Returns a new game played on one board of the corpus
+        """
+        return environment_class.from_mask(self[index])
+
+
+def write(path, masks):
+    """
+    Write boards (2D boolean mine masks, all of the same size) to a corpus file, and return the number of boards
+    """
+    masks = np.asarray(masks, dtype=bool)
+    boards, height, width = masks.shape
+    header = np.array([(MAGIC, boards, height, width)], dtype=HEADER)
+    packed = np.packbits(masks.reshape(boards, height * width), axis=1)
+    with open(path, "wb") as stream:
+        stream.write(header.tobytes())
+        stream.write(packed.tobytes())
+    return boards
+
+
+def generate(count, height, width, mines, seed=None):
+    """
+    Returns count random boards with the given number of mines as a 3D boolean array, reproducible from the seed
+    """
+    rng = np.random.default_rng(seed)
+    # a random permutation of the cells of every board at once, the first cells of each become its mines
+    positions = np.argsort(rng.random((count, height * width)), axis=1)[:, :mines]
+    masks = np.zeros((count, height * width), dtype=bool)
+    np.put_along_axis(masks, positions, True, axis=1)
+    return masks.reshape(count, height, width)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a corpus of Minesweeper boards for benchmarks")
+    parser.add_argument("path")
+    parser.add_argument("--boards", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--mines", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    boards = write(args.path, generate(args.boards, args.height, args.width, args.mines, args.seed))
+    print(f"Wrote {boards} boards of {args.height}x{args.width} with {args.mines} mines to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import FrontierSolver
+import Guesser
+import ImprovedAgent
+
+
+class CSPAgent(ImprovedAgent.ImprovedAgent):
+    """
+    This agent extends the improved agent with an exact constraint solver.
+    When the pairwise subset reasoning of the improved agent finds no safe move, the frontier (the hidden cells that
+    appear in a clue) is split into independent components, each component is solved exactly by backtracking over its
+    cells, and every cell that is safe or a mine in all solutions consistent with the total number of mines is marked.
+    Components larger than max_component cells are skipped, leaving them to the improved agent's reasoning and to a
+    random move. By default random moves are probability weighted, sharing the solved components with the solver.
+    """
+
+    def __init__(self, height=50, width=50, mines=None, guessing="probability", trace=None,
+                 seed=None, stats=False, sparse=False, max_component=24, max_nodes=200000):
+        super().__init__(height=height, width=width, mines=mines, guessing=guessing, trace=trace, seed=seed,
+                         stats=stats, sparse=sparse)
+        self.solver = FrontierSolver.Solver(max_component, max_nodes)
+        if self.guesser is not None:
+            self.guesser = Guesser.ProbabilityGuesser(self.solver)
+
+    def move_safely(self):
+        """
+        Picks a safe move like the improved agent. If there is none, solve the frontier exactly and try again
+        """
+        move = super().move_safely()
+        if move is None and self.solveFrontier():
+            move = super().move_safely()
+        return move
+
+    def solveFrontier(self):
+        """
+        Mark every cell that the exact solver determines as safe or a mine, then draw the inferences that follow.
+        Returns the number of cells that were marked
+        """
+        unknown = self.height * self.width - len(self.safeSet) - len(self.mineSet)
+        frontier = len(self.knowledgeBase.cellIndex)
+        remaining = None if self.mines is None else self.mines - len(self.mineSet)
+
+        parts = self.solver.components(self.knowledgeBase)
+        safes, mines, interior = FrontierSolver.forcedCells(parts, remaining, unknown - frontier)
+        if interior is not None:
+            # every hidden cell outside the frontier is determined, which only happens close to the end of a game
+            hidden = [cell for cell in self.availableCells
+                      if cell not in self.safeSet and cell not in self.knowledgeBase.cellIndex]
+            if interior == "safe":
+                safes.update(hidden)
+            else:
+                mines.update(hidden)
+
+        for cell in mines:
+            self.MarkMine(cell)
+        for cell in safes:
+            self.MarkSafe(cell)
+        self.drawInferences()
+        return len(safes) + len(mines)
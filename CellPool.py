@@ -0,0 +1,127 @@
+import random
+
+
+class CellPool():
+    """
+    Set of board cells that can also be indexed, so that a random cell can be picked without building a tuple.
+    Cells are kept in a list together with a dictionary from each cell to its position in the list. A cell is removed
+    by moving the last cell of the list into its place, so adding, removing, membership and random picks are all
+    constant time. Random picks are drawn from rng, e.g. the random.Random of an agent, or the global random module.
+    """
+
+    def __init__(self, cells=(), rng=random):
+        self.rng = rng
+        self.cells = []
+        self.positions = {}
+        for cell in cells:
+            self.add(cell)
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        position = self.positions.pop(cell, None)
+        if position is None:
+            return
+        last = self.cells.pop()
+        if position < len(self.cells):
+            self.cells[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        """
+        Returns a cell picked uniformly at random, or None if the pool is empty
+        """
+        if not self.cells:
+            return None
+        return self.cells[self.rng.randrange(len(self.cells))]
+
+    def choiceExcluding(self, excluded, attempts=32):
+        """
+        Returns a cell picked uniformly at random among the cells that are not in excluded, or None if there is none.
+        Random cells are drawn until one is not excluded, so this stays cheap while excluded cells are a minority; once
+        that fails repeatedly the remaining cells are listed instead
+        """
+        for _ in range(attempts):
+            cell = self.choice()
+            if cell is None:
+                return None
+            if cell not in excluded:
+                return cell
+        remaining = [cell for cell in self if cell not in excluded]
+        return self.rng.choice(remaining) if remaining else None
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+# A SparseCellPool lists its remaining cells once fewer than one cell in LIST_BELOW is left, as picking a random cell by
+# drawing coordinates would then take more than LIST_BELOW draws on average
+LIST_BELOW = 16
+
+
+class SparseCellPool(CellPool):
+    """
+    Pool of every cell of a height x width board except the ones that were discarded, for boards too large to list all
+    of their cells. Only the discarded cells are stored; the cells still in the pool are implicit, and a random cell is
+    picked by drawing random coordinates until one was not discarded. That takes few draws while a good part of the
+    board is left, so once fewer than one cell in LIST_BELOW is left the remaining cells are listed in a CellPool, which
+    then takes over, and the discarded cells are forgotten.
+    """
+
+    def __init__(self, height, width, rng=random):
+        self.height = height
+        self.width = width
+        self.rng = rng
+        self.removed = set()  # cells discarded from the board, until the pool is listed
+        self.pool = None  # CellPool of the remaining cells once listed
+
+    def add(self, cell):
+        if self.pool is not None:
+            self.pool.add(cell)
+        else:
+            self.removed.discard(cell)
+
+    def discard(self, cell):
+        if self.pool is not None:
+            self.pool.discard(cell)
+        elif cell in self:
+            self.removed.add(cell)
+
+    def choice(self):
+        """
+        Returns a cell picked uniformly at random, or None if the pool is empty
+        """
+        if self.pool is None and len(self) * LIST_BELOW < self.height * self.width:
+            self.pool = CellPool(iter(self), self.rng)
+            self.removed = None
+        if self.pool is not None:
+            return self.pool.choice()
+        while True:
+            cell = (self.rng.randrange(self.height), self.rng.randrange(self.width))
+            if cell not in self.removed:
+                return cell
+
+    def __contains__(self, cell):
+        if self.pool is not None:
+            return cell in self.pool
+        i, j = cell
+        return 0 <= i < self.height and 0 <= j < self.width and cell not in self.removed
+
+    def __iter__(self):
+        if self.pool is not None:
+            return iter(self.pool)
+        return ((i, j) for i in range(self.height) for j in range(self.width) if (i, j) not in self.removed)
+
+    def __len__(self):
+        if self.pool is not None:
+            return len(self.pool)
+        return self.height * self.width - len(self.removed)
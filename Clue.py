@@ -6,21 +6,43 @@ import random
 class Clue():
     """
     Each clue essentially contains a set of board cells as well as a count which indicates how many of those cells in
-    the set are mines
+    the set are mines.
+    Clues are hashable: two clues with the same cells and count are equal and hash the same, so a knowledge base can
+    keep them in a dictionary. The cells are a frozenset and a clue is never changed in place; WithMine and WithSafe
+    return the updated clue instead.
     """
 
     def __init__(self, cells, count):  # initialize the clue class with cells and a count representing number of
         # neighboring mines
 
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
+    def __hash__(self):
+        return hash((self.cells, self.count))
+
+    def __len__(self):
+        return len(self.cells)
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def IsSubset(self, other):
+        """
+        Returns whether every cell of this clue is also a cell of the other clue
+        """
+        return self.cells.issubset(other.cells)
+
+    def Difference(self, other):
+        """
+        Returns the clue made of the cells of this clue that are not in the other clue. When the other clue is a subset
+        of this one, the mines of the difference are the mines of this clue minus the mines of the other
+        """
+        return Clue(self.cells.difference(other.cells), self.count - other.count)
+
     def MinesKnown(self):
         """
         Returns a set of all cells in self.cells that are known to be mines, given that the length of the set is equal
@@ -40,23 +62,14 @@ class Clue():
         else:
             return set()
 
-    def MarkMine(self, cell):
+    def WithMine(self, cell):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be a mine.
+        Returns the clue that remains once a cell of this clue is known to be a mine, leaving this clue unchanged
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
-            self.count -= 1
-            return 1
-        return 0
+        return Clue(self.cells - {cell}, self.count - 1)
 
-    def MarkSafe(self, cell):
+    def WithSafe(self, cell):
         """
-        Updates internal knowledge representation given the fact that
-        a cell is known to be safe.
+        Returns the clue that remains once a cell of this clue is known to be safe, leaving this clue unchanged
         """
-        if cell in self.cells:
-            self.cells.remove(cell)
-            return 1
-        return 0
\ No newline at end of file
+        return Clue(self.cells - {cell}, self.count)
@@ -1,40 +1,85 @@
 import numpy as np
 import random
 
+# Values returned by Environment.status
+IN_PROGRESS = "in progress"
+WON = "won"
+LOST = "lost"
+
 
 class Environment():
     """
     Minesweeper game representation
     """
 
-    def __init__(self, height=50, width=50, mines=100):
+    def __init__(self, height=50, width=50, mines=100, seed=None, board=None):
         """"
-        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines
+        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines.
+        The mines are placed with the game's own random number generator, so the same seed always gives the same board.
+        A board (2D boolean mine mask) can be given instead, see from_mask.
         """
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
-
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly to the board
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
-
-        # Maintain a set of mines that is found by the player
+        self.rng = random.Random(seed)
+
+        if board is None:
+            # Initialize an empty field with no mines
+            board = []
+            for i in range(self.height):
+                row = []
+                for j in range(self.width):
+                    row.append(False)
+                board.append(row)
+
+            # Add mines randomly to the board
+            placed = 0
+            while placed != mines:
+                i = self.rng.randrange(height)
+                j = self.rng.randrange(width)
+                if not board[i][j]:
+                    board[i][j] = True
+                    placed += 1
+
+        self.load(board)
+
+    @classmethod
+    def from_mask(cls, mask):
+        """
+        Returns a game played on the given board, a 2D boolean mine mask such as one read from a BoardCorpus
+        """
+        mask = np.asarray(mask, dtype=bool)
+        height, width = mask.shape
+        return cls(height=height, width=width, mines=int(mask.sum()), board=mask)
+
+    def load(self, board):
+        """
+        Set up the board from a 2D boolean mine mask, with no cell revealed or flagged yet
+        """
+        self.board = [[bool(mine) for mine in row] for row in board]
+        self.mines = {(i, j) for i, row in enumerate(self.board) for j, mine in enumerate(row) if mine}
+        self.mineCount = len(self.mines)
+
+        self._reset_play_state()
+
+    def _reset_play_state(self):
+        """
+        Start a new game on the loaded board, with no cell revealed or flagged yet
+        """
+        # Maintain a set of mines that is found by the player, i.e. the flags that are on a mine
         self.mines_found = set()  # initially this set is empty
 
+        # Maintain the cells that have been revealed, flagged, or revealed while being a mine
+        self.revealed = set()
+        self.flags = set()
+        self.triggered = set()
+
+    def mask(self):
+        """
+        Returns the board as a 2D boolean NumPy array, e.g. to store it in a BoardCorpus
+        """
+        return np.array(self.board, dtype=bool).reshape(self.height, self.width)
+
     def is_mine(self, cell):
         i, j = cell # a board cell contains a row and column, where i is row and j is column
         return self.board[i][j]
@@ -66,3 +111,211 @@ class Environment():
 
     def mineList(self):
         return self.mines
+
+    def reveal(self, cell):
+        """
+        Reveal a cell and return the list of (cell, clue) pairs that became visible.
+        A clue of 0 means none of the neighbours is a mine, so they are revealed as well, flood filling the connected
+        region of zero clues and its border in a single call. Cells that were already revealed are skipped, and a flag on
+        a cell that is revealed is removed. Revealing a mine reveals nothing and records the mine as triggered.
+        """
+        if cell in self.revealed or cell in self.triggered:
+            return []
+        if self.is_mine(cell):
+            self.triggered.add(cell)
+            return []
+
+        revealed = []
+        self.revealed.add(cell)
+        stack = [cell]
+        while stack:
+            current = stack.pop()
+            self.unflag(current)
+            count = self.mineNeighbor(current)
+            revealed.append((current, count))
+            if count:
+                continue
+            i, j = current
+            for row in range(max(0, i - 1), min(i + 2, self.height)):
+                for col in range(max(0, j - 1), min(j + 2, self.width)):
+                    if (row, col) not in self.revealed:
+                        self.revealed.add((row, col))
+                        stack.append((row, col))
+        return revealed
+
+    def flag(self, cell):
+        """
+        Mark a cell as a mine. Revealed cells can not be flagged
+        """
+        if cell in self.revealed or cell in self.flags:
+            return
+        self.flags.add(cell)
+        if self.is_mine(cell):
+            self.mines_found.add(cell)
+
+    def unflag(self, cell):
+        """
+        Remove the flag from a cell, if it has one
+        """
+        self.flags.discard(cell)
+        self.mines_found.discard(cell)
+
+    def toggle_flag(self, cell):
+        if cell in self.flags:
+            self.unflag(cell)
+        else:
+            self.flag(cell)
+
+    def status(self):
+        """
+        Returns IN_PROGRESS, WON or LOST in constant time, from counts that are kept up to date as cells are revealed
+        and flagged.
+        The game is over once every safe cell is revealed, or every mine is flagged without any wrong flag. As in the
+        gameplay scripts, triggering a mine does not stop the game, but a game that ends with a triggered mine is lost.
+        """
+        allRevealed = len(self.revealed) == self.height * self.width - self.mineCount
+        allFlagged = len(self.mines_found) == self.mineCount == len(self.flags)
+        if not (allRevealed or allFlagged):
+            return IN_PROGRESS
+        return LOST if self.triggered else WON
+
+
+class ArrayEnvironment(Environment):
+    """
+    Minesweeper game representation backed by NumPy arrays.
+    The mines are placed with a single sample without replacement and the clue of every cell is computed once when
+    the board is generated, so is_mine and mineNeighbor are constant time array lookups.
+    """
+
+    def __init__(self, height=50, width=50, mines=100, seed=None, board=None):
+        """
+        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines, or play
+        on a given board (2D boolean mine mask)
+        """
+        self.height = height
+        self.width = width
+        self.rng = random.Random(seed)
+
+        if board is None:
+            # The NumPy generator is seeded from the game's own random number generator, so a seed reproduces the board
+            rng = np.random.default_rng(self.rng.getrandbits(64))
+            positions = rng.choice(height * width, size=mines, replace=False)
+            board = np.zeros(height * width, dtype=bool)
+            board[positions] = True
+            board = board.reshape(height, width)
+
+        self.load(board)
+
+    def load(self, board):
+        """
+        Set up the board from a 2D boolean mine mask, with no cell revealed or flagged yet
+        """
+        height, width = self.height, self.width
+
+        # Boolean mine mask, one byte per cell instead of a list of lists of Python objects
+        self.board = np.array(board, dtype=bool).reshape(height, width)
+
+        rows, cols = np.nonzero(self.board)
+        self.mines = set(zip(rows.tolist(), cols.tolist()))
+        self.mineCount = len(self.mines)
+
+        # Count the mines around every cell at once by summing the eight shifted copies of the zero padded mask
+        padded = np.pad(self.board.astype(np.uint8), 1)
+        self.clues = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.clues += padded[di:di + height, dj:dj + width]
+
+        self._reset_play_state()
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.board[i, j])
+
+    def mask(self):
+        return self.board.copy()
+
+    def mineNeighbor(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        return int(self.clues[i, j])
+
+
+class BitmapEnvironment(Environment):
+    """
+    Minesweeper game representation for very large boards (1000x1000 and more).
+    The mines are kept in a bitmap of one bit per cell, with each board row starting on a new byte, and nothing else is
+    stored per cell: clues are counted from the bitmap when a cell is revealed, and only the cells that were revealed,
+    flagged or triggered are kept in sets. The mines are placed like ArrayEnvironment places them, so the same seed
+    gives the same board, but straight into the bitmap without building a mask of the board first.
+    """
+
+    def __init__(self, height=50, width=50, mines=100, seed=None, board=None):
+        """
+        Take in desired dimensions and a given number of mines to generate a board with randomly placed mines, or play
+        on a given board (2D boolean mine mask)
+        """
+        self.height = height
+        self.width = width
+        self.rng = random.Random(seed)
+        self.stride = (width + 7) // 8  # bytes per board row
+
+        if board is None:
+            rng = np.random.default_rng(self.rng.getrandbits(64))
+            rows, cols = np.divmod(rng.choice(height * width, size=mines, replace=False), width)
+            bits = np.zeros((height, self.stride), dtype=np.uint8)
+            # unbuffered, since mines close to each other set bits of the same byte
+            np.bitwise_or.at(bits, (rows, cols >> 3), (128 >> (cols & 7)).astype(np.uint8))
+            self.load_bits(bits)
+        else:
+            self.load(board)
+
+    def load(self, board):
+        """
+        Set up the board from a 2D boolean mine mask, with no cell revealed or flagged yet
+        """
+        self.load_bits(np.packbits(np.array(board, dtype=bool).reshape(self.height, self.width), axis=1))
+
+    def load_bits(self, bits):
+        """
+        Set up the board from its bitmap, a (height, stride) array of bytes as returned by np.packbits(mask, axis=1)
+        """
+        # A bytearray is indexed faster than a NumPy array and returns plain integers
+        self.bits = bytearray(bits.tobytes())
+        self.mineCount = int(np.unpackbits(bits).sum())
+
+        self._reset_play_state()
+
+    def is_mine(self, cell):
+        i, j = cell
+        return bool(self.bits[i * self.stride + (j >> 3)] & (128 >> (j & 7)))
+
+    def mask(self):
+        bits = np.frombuffer(bytes(self.bits), dtype=np.uint8).reshape(self.height, self.stride)
+        return np.unpackbits(bits, axis=1, count=self.width).astype(bool)
+
+    def mineList(self):
+        """
+        Returns the set of mines, which is built from the bitmap on every call
+        """
+        rows, cols = np.nonzero(self.mask())
+        return set(zip(rows.tolist(), cols.tolist()))
+
+    def mineNeighbor(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        i, j = cell
+        counter = 0
+        for row in range(max(0, i - 1), min(i + 2, self.height)):
+            for col in range(max(0, j - 1), min(j + 2, self.width)):
+                if self.bits[row * self.stride + (col >> 3)] & (128 >> (col & 7)):
+                    counter += 1
+        return counter - self.is_mine(cell)
@@ -0,0 +1,286 @@
+import math
+
+
+class Component():
+    """
+    A connected group of frontier cells together with the clues that constrain them. Two clues belong to the same
+    component when they share a cell, so the mines of one component never depend on the cells of another, except
+    through the total number of mines on the board.
+    After solve, solutions maps each possible number of mines in the component to the number of mine placements that
+    satisfy every clue, and mineCounts maps it to, for each cell, how many of those placements put a mine on the cell.
+    """
+
+    def __init__(self, cells, clues):
+        self.cells = cells  # list of cells, in the order they are assigned while solving
+        self.clues = clues
+        self.solutions = {}
+        self.mineCounts = {}
+        self.capped = False  # True if the component was too large to be solved exactly
+
+    def solve(self, max_cells=24, max_nodes=200000):
+        """
+        Enumerate every placement of mines on the component's cells that satisfies all of its clues, by backtracking
+        over the cells one at a time and pruning as soon as a clue can no longer be satisfied.
+        Components with more than max_cells cells, or that need more than max_nodes steps, are not solved: capped is
+        set and no solutions are recorded.
+        """
+        if len(self.cells) > max_cells:
+            self.capped = True
+            return self
+
+        position = {cell: index for index, cell in enumerate(self.cells)}
+        cellClues = [[] for _ in self.cells]
+        need = []  # mines each clue still needs
+        left = []  # cells of each clue that are still unassigned
+        for index, clue in enumerate(self.clues):
+            need.append(clue.count)
+            left.append(len(clue))
+            for cell in clue.cells:
+                cellClues[position[cell]].append(index)
+
+        assignment = [0] * len(self.cells)
+        nodes = [0]
+
+        def backtrack(i, mines):
+            nodes[0] += 1
+            if nodes[0] > max_nodes:
+                return False
+            if i == len(self.cells):
+                self.solutions[mines] = self.solutions.get(mines, 0) + 1
+                counts = self.mineCounts.setdefault(mines, [0] * len(self.cells))
+                for index, value in enumerate(assignment):
+                    counts[index] += value
+                return True
+
+            for value in (0, 1):
+                consistent = True
+                for index in cellClues[i]:
+                    left[index] -= 1
+                    need[index] -= value
+                    if need[index] < 0 or need[index] > left[index]:
+                        consistent = False
+                assignment[i] = value
+                if consistent and not backtrack(i + 1, mines + value):
+                    consistent = None  # node budget exhausted
+                for index in cellClues[i]:
+                    left[index] += 1
+                    need[index] += value
+                if consistent is None:
+                    return False
+            assignment[i] = 0
+            return True
+
+        if not backtrack(0, 0):
+            self.capped = True
+            self.solutions = {}
+            self.mineCounts = {}
+        return self
+
+    def possibleMines(self):
+        """
+        Returns the set of numbers of mines the component can contain. Capped components are assumed to be able to
+        contain any number of mines up to their size
+        """
+        if self.capped:
+            return set(range(len(self.cells) + 1))
+        return set(self.solutions)
+
+
+def components(knowledgeBase):
+    """
+    Split the clues of a knowledge base into independent components of clues that are connected through shared cells
+    """
+    result = []
+    seen = set()
+    for start in knowledgeBase:
+        if start in seen or len(start) == 0:
+            continue
+        seen.add(start)
+        clues = []
+        cells = []
+        placed = set()
+        stack = [start]
+        while stack:
+            clue = stack.pop()
+            clues.append(clue)
+            # list the cells in the order they are reached so that neighbouring cells are assigned one after another
+            for cell in sorted(clue.cells):
+                if cell in placed:
+                    continue
+                placed.add(cell)
+                cells.append(cell)
+                for other in knowledgeBase.cluesWith(cell):
+                    if other not in seen:
+                        seen.add(other)
+                        stack.append(other)
+        result.append(Component(cells, clues))
+    return result
+
+
+def sumsOf(sets, limit):
+    """
+    Returns the set of totals that can be made by picking one number from each set, ignoring totals above limit
+    """
+    totals = {0}
+    for numbers in sets:
+        totals = {total + number for total in totals for number in numbers if total + number <= limit}
+    return totals
+
+
+def feasibleMines(parts, remaining, interior):
+    """
+    For each component in parts, returns the set of its possible numbers of mines that are consistent with the other
+    components and with the remaining number of mines, given the number of interior cells (hidden cells that are not
+    in any clue), and also returns the feasible numbers of interior mines.
+    When remaining is None the total number of mines is unknown and every combination is feasible.
+    """
+    possible = [part.possibleMines() for part in parts]
+    if remaining is None:
+        return possible, set(range(interior + 1))
+
+    # totals reachable by the components before and after each one
+    before = [{0}]
+    for numbers in possible:
+        before.append(sumsOf([before[-1], numbers], remaining))
+    after = [{0}]
+    for numbers in reversed(possible):
+        after.append(sumsOf([after[-1], numbers], remaining))
+    after.reverse()
+
+    feasible = []
+    for index, numbers in enumerate(possible):
+        others = sumsOf([before[index], after[index + 1]], remaining)
+        feasible.append({mines for mines in numbers
+                         if any(0 <= remaining - mines - total <= interior for total in others)})
+    interiorMines = {remaining - total for total in before[-1] if 0 <= remaining - total <= interior}
+    return feasible, interiorMines
+
+
+class Solver():
+    """
+    Solves the components of a knowledge base, remembering the solved component for each set of clues so that the
+    components that did not change since the last call are not solved again
+    """
+
+    def __init__(self, max_cells=24, max_nodes=200000):
+        self.max_cells = max_cells
+        self.max_nodes = max_nodes
+        self.cache = {}  # frozenset of a component's clues -> solved Component
+
+    def components(self, knowledgeBase):
+        """
+        Returns the solved components of the knowledge base
+        """
+        parts = []
+        cache = {}
+        for part in components(knowledgeBase):
+            key = frozenset(part.clues)
+            solved = self.cache.get(key)
+            if solved is None:
+                solved = part.solve(self.max_cells, self.max_nodes)
+            cache[key] = solved
+            parts.append(solved)
+        # only keep the components that are still current, so the cache does not grow over a game
+        self.cache = cache
+        return parts
+
+
+def forcedCells(parts, remaining=None, interior=0):
+    """
+    Given solved components, return the cells that are safe, or mines, in every solution that is consistent with the
+    remaining number of mines.
+    Returns (safes, mines, interior) where interior is "safe" or "mine" if every interior cell is known to be safe or a
+    mine, and None otherwise. Components that hit the size cap contribute no cells.
+    """
+    feasible, interiorMines = feasibleMines(parts, remaining, interior)
+
+    safes = set()
+    mines = set()
+    for part, possible in zip(parts, feasible):
+        if part.capped or not possible:
+            continue
+        total = sum(part.solutions[count] for count in possible)
+        for index, cell in enumerate(part.cells):
+            onCell = sum(part.mineCounts[count][index] for count in possible)
+            if onCell == 0:
+                safes.add(cell)
+            elif onCell == total:
+                mines.add(cell)
+
+    interiorState = None
+    if interior and interiorMines == {0}:
+        interiorState = "safe"
+    elif interior and interiorMines == {interior}:
+        interiorState = "mine"
+    return safes, mines, interiorState
+
+
+def convolve(first, second):
+    """
+    Combine two distributions {mines: number of placements} of independent groups of cells into the distribution of
+    their total
+    """
+    result = {}
+    for mines1, ways1 in first.items():
+        for mines2, ways2 in second.items():
+            result[mines1 + mines2] = result.get(mines1 + mines2, 0) + ways1 * ways2
+    return result
+
+
+def mineProbabilities(parts, remaining=None, interior=0):
+    """
+    Returns ({cell: probability of a mine} for the frontier cells, probability of a mine on each interior cell).
+    Every placement of mines consistent with the clues is taken as equally likely. When the remaining number of mines
+    is known, a placement of k mines on the frontier is weighted by the number of ways to put the other mines on the
+    interior cells, comb(interior, remaining - k). The cells of capped components are counted as interior cells and
+    given the interior probability.
+    Returns ({}, None) if no placement is consistent.
+    """
+    solved = [part for part in parts if not part.capped]
+    interior = interior + sum(len(part.cells) for part in parts if part.capped)
+
+    def interiorWays(mines):
+        if remaining is None:
+            return 1
+        mines = remaining - mines
+        return math.comb(interior, mines) if 0 <= mines <= interior else 0
+
+    # distribution of the total number of mines on the components before and after each one
+    before = [{0: 1}]
+    for part in solved:
+        before.append(convolve(before[-1], part.solutions))
+    after = [{0: 1}]
+    for part in reversed(solved):
+        after.append(convolve(after[-1], part.solutions))
+    after.reverse()
+
+    total = sum(ways * interiorWays(mines) for mines, ways in before[-1].items())
+    if total == 0:
+        return {}, None
+
+    probabilities = {}
+    for index, part in enumerate(solved):
+        others = convolve(before[index], after[index + 1])
+        onCells = [0] * len(part.cells)
+        for mines, counts in part.mineCounts.items():
+            weight = sum(ways * interiorWays(mines + other) for other, ways in others.items())
+            if weight:
+                for position, count in enumerate(counts):
+                    onCells[position] += count * weight
+        for position, cell in enumerate(part.cells):
+            probabilities[cell] = onCells[position] / total
+
+    if not interior:
+        interiorProbability = None
+    elif remaining is None:
+        # without the total number of mines the interior is assumed to be as dense as the frontier
+        interiorProbability = sum(probabilities.values()) / len(probabilities) if probabilities else 0.5
+    else:
+        expected = sum(ways * interiorWays(mines) * (remaining - mines) for mines, ways in before[-1].items())
+        interiorProbability = expected / total / interior
+
+    for part in parts:
+        if part.capped:
+            for cell in part.cells:
+                probabilities[cell] = interiorProbability
+    return probabilities, interiorProbability
@@ -0,0 +1,102 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+import BoardCorpus
+import Simulation
+
+# Corpus files opened by this process, so that a worker maps each file once however many of its games it plays
+CORPORA = {}
+
+
+def play_task(task):
+    """
+    Worker entry point: plays the single game described by task and returns (seed, result).
+    Every game carries its own seed, so the result of a game never depends on which worker played it or on how many
+    workers there are. With a corpus path, the game is played on board seed - start of that corpus file, wrapping
+    around, where start is the seed of the first game.
+    """
+    agent, height, width, mines, seed, board, agent_options, corpus, start = task
+    mask = None
+    if corpus is not None:
+        if corpus not in CORPORA:
+            CORPORA[corpus] = BoardCorpus.BoardCorpus(corpus)
+        mask = CORPORA[corpus][(seed - start) % len(CORPORA[corpus])]
+    return seed, Simulation.play_game(Simulation.AGENTS[agent], height, width, mines, seed,
+                                      Simulation.ENVIRONMENTS[board], agent_options, mask)
+
+
+def run_farm(agent="improved", games=1000, height=50, width=50, mines=100, seed=0, board="list",
+             agent_options=None, workers=None, chunksize=None, callback=None, corpus=None):
+    """
+    Spreads games with seeds seed, seed + 1, ..., seed + games - 1 over a pool of worker processes.
+    Results are streamed back to this process as they finish; callback(seed, result) is called for each one.
+    Returns the same summary as Simulation.run_batch for the same seeds, regardless of the number of workers.
+    corpus is the path of a BoardCorpus file whose boards are played instead of random ones; only the path is sent to
+    the workers, which map the file themselves.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = [(agent, height, width, mines, seed + i, board, agent_options, corpus, seed) for i in range(games)]
+    if chunksize is None:
+        # A few chunks per worker keeps the pool busy at the end of the run without paying for one round trip per game
+        chunksize = max(1, games // (workers * 4))
+
+    results = {}
+    start = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            game_seed, result = play_task(task)
+            results[game_seed] = result
+            if callback:
+                callback(game_seed, result)
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            for game_seed, result in pool.imap_unordered(play_task, tasks, chunksize):
+                results[game_seed] = result
+                if callback:
+                    callback(game_seed, result)
+    elapsed = time.perf_counter() - start
+
+    # Aggregate in seed order so the summary is identical however the games were scheduled
+    return Simulation.summarize([results[game_seed] for game_seed in sorted(results)], elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many Minesweeper games in parallel across all cores")
+    parser.add_argument("--agent", choices=sorted(Simulation.AGENTS), default="improved")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=50)
+    parser.add_argument("--width", type=int, default=50)
+    parser.add_argument("--mines", type=int, default=100)
+    parser.add_argument("--densities", type=str, default=None,
+                        help="comma separated mine densities to sweep, e.g. 0.05,0.1,0.15 (overrides --mines)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board", choices=sorted(Simulation.ENVIRONMENTS), default="list")
+    parser.add_argument("--guessing", choices=["uniform", "probability"], default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--corpus", default=None,
+                        help="play the boards of this corpus file (see BoardCorpus.py) instead of random boards")
+    parser.add_argument("--stats", action="store_true",
+                        help="count the work the agent does (comparisons, inferences, ...) and time its phases")
+    parser.add_argument("--sparse", action="store_true",
+                        help="keep no per cell state in the agent, for very large boards (use with --board bitmap)")
+    args = parser.parse_args(argv)
+
+    agent_options = {"stats": args.stats, "sparse": args.sparse}
+    if args.guessing:
+        agent_options["guessing"] = args.guessing
+
+    if args.densities:
+        sweep = [round(float(density) * args.height * args.width) for density in args.densities.split(",")]
+    else:
+        sweep = [args.mines]
+
+    for mines in sweep:
+        summary = run_farm(args.agent, args.games, args.height, args.width, mines, args.seed, args.board,
+                           agent_options, args.workers, corpus=args.corpus)
+        Simulation.report(f"{mines} mines", summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+import argparse
+import os
+import sys
+import time
+
+import Environment
+import Simulation
+import SolverThread
+import Trace
+
+# Name of each agent as shown in the window
+LABELS = {
+    "basic": "Basic Agent",
+    "improved": "Improved Agent",
+    "csp": "CSP Agent",
+}
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+
+# Colors
+MAGENTA = (255, 0, 255)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+
+def play_window(agent, height=10, width=10, mines=15, seed=None, window=(1050, 700), fps=30, moves_per_frame=None,
+                autoplay=False, tracer=None):
+    """
+    Opens the game window and lets the player and the agent play until the window is closed.
+    pygame, the fonts and the images are only loaded here, so the headless runners never pay for them.
+    fps is the frame rate of the window and moves_per_frame how many moves the agent makes each frame in auto-play
+    (None: as many as fit in a frame). With autoplay the instructions are skipped and the agent starts playing at once.
+    Each new game is played with seed, seed + 1, ... if a seed is given.
+    """
+    import pygame
+    import Renderer
+
+    HEIGHT, WIDTH, MINES = height, width, mines
+    FPS, MOVES_PER_FRAME = fps, moves_per_frame
+    tracer = tracer or Trace.Tracer(Trace.SUMMARY)
+
+    # Create game
+    pygame.init()
+    size = width, height = window
+    screen = pygame.display.set_mode(size)
+
+    # Fonts
+    OPEN_SANS = os.path.join(ASSETS, "fonts", "OpenSans-Regular.ttf")
+    smallFont = pygame.font.Font(OPEN_SANS, 20)
+    mediumFont = pygame.font.Font(OPEN_SANS, 28)
+    largeFont = pygame.font.Font(OPEN_SANS, 40)
+
+    # Compute board size
+    BOARD_PADDING = 20
+    board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
+    board_height = height - (BOARD_PADDING * 2)
+    cell_size = int(min(board_width / WIDTH, board_height / HEIGHT))
+    board_origin = (BOARD_PADDING, BOARD_PADDING)
+
+    # Add images
+    flag = pygame.image.load(os.path.join(ASSETS, "images", "VrindaHasFlag.png"))
+    flag = pygame.transform.scale(flag, (cell_size, cell_size))
+    mine = pygame.image.load(os.path.join(ASSETS, "images", "AzimIsTheMine.png"))
+    mine = pygame.transform.scale(mine, (cell_size, cell_size))
+
+    # The board is drawn by a renderer that keeps it on its own surface and redraws only the cells that change
+    renderer = Renderer.BoardRenderer(HEIGHT, WIDTH, cell_size, board_origin, smallFont, flag, mine)
+
+    games = 0
+
+    def new_game():
+        """
+        Create game and AI agent, the agent thinks in its own thread so that the window never waits on it
+        """
+        boardSeed, agentSeed = Simulation.game_seeds(None if seed is None else seed + games)
+        game = Environment.Environment(height=HEIGHT, width=WIDTH, mines=MINES, seed=boardSeed)
+        ai = Simulation.AGENTS[agent](height=HEIGHT, width=WIDTH, mines=MINES, trace=tracer, seed=agentSeed)
+        solver = SolverThread.SolverThread(ai)
+        solver.start()
+        return game, solver
+
+    game, solver = new_game()
+
+    # The game keeps track of revealed cells, flagged cells and triggered mines; keep track of if a mine was hit
+    lost = False
+
+    # Show instructions initially, unless the agent starts playing on its own
+    instructions = not autoplay
+
+    clock = pygame.time.Clock()
+
+    def make_move(move):
+        """
+        Reveal a cell and send what was learnt to the AI
+        """
+        if game.is_mine(move):
+            # lost = True
+            solver.mine(move)
+            game.reveal(move)  # records the triggered mine
+            tracer.summary(f"Mine Triggered at {move}")
+        else:
+            # Revealing a cell with no neighbouring mines opens up the whole region around it in one go, taking down any
+            # flags on the revealed cells
+            solver.observe(game.reveal(move))
+
+    def ai_move(result):
+        """
+        Play a move chosen by the AI and flag the mines it knows, returns False if it had no move left to make
+        """
+        move, mines = result
+        # Added Code to Update Flags in RealTime
+        for ai_mine in mines:
+            game.flag(ai_mine)
+        if move is None:
+            for cell in game.flags - mines:
+                game.unflag(cell)
+            return False
+        # the player may have revealed the cell while the AI was thinking
+        if move not in game.revealed:
+            make_move(move)
+        return True
+
+    while True:
+
+        # Check if game quit, and collect the left and right clicks, which act once per click
+        clicks = []
+        rightClicks = []
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                solver.stop()
+                tracer.close()
+                sys.exit()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                clicks.append(event.pos)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
+                rightClicks.append(event.pos)
+
+        screen.fill(MAGENTA)
+
+        # Show game instructions
+        if instructions:
+
+            # Title
+            title = largeFont.render("Play Minesweeper", True, WHITE)
+            titleRect = title.get_rect()
+            titleRect.center = ((width / 2), 50)
+            screen.blit(title, titleRect)
+
+            # Rules
+            rules = [
+                "Click a cell to reveal it.",
+                "Right-click a cell to mark it as a mine.",
+                "Mark all mines successfully to win!"
+            ]
+            for i, rule in enumerate(rules):
+                line = smallFont.render(rule, True, WHITE)
+                lineRect = line.get_rect()
+                lineRect.center = ((width / 2), 150 + 30 * i)
+                screen.blit(line, lineRect)
+
+            # Play game button
+            buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
+            buttonText = mediumFont.render("Play Game", True, BLACK)
+            buttonTextRect = buttonText.get_rect()
+            buttonTextRect.center = buttonRect.center
+            pygame.draw.rect(screen, WHITE, buttonRect)
+            screen.blit(buttonText, buttonTextRect)
+
+            # Check if play button clicked
+            for mouse in clicks:
+                if buttonRect.collidepoint(mouse):
+                    instructions = False
+
+            pygame.display.flip()
+            clock.tick(FPS)
+            continue
+
+        # Draw board, only the cells that changed since the last frame are redrawn
+        renderer.draw(screen, game, lost)
+
+        # TYPE OF AGENT
+        AgentType = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 200,
+            (width / 3) - BOARD_PADDING * 2, 50)
+        buttonText = mediumFont.render(LABELS[agent], True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = AgentType.center
+        pygame.draw.rect(screen, MAGENTA, AgentType)
+        screen.blit(buttonText, buttonRect)
+
+        # TOTAL MINES
+        AgentType = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 150,
+            (width / 3) - BOARD_PADDING * 2, 50)
+        buttonText = mediumFont.render("Total Mines: " + str(MINES), True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = AgentType.center
+        pygame.draw.rect(screen, MAGENTA, AgentType)
+        screen.blit(buttonText, buttonRect)
+
+        # AI Move button
+        aiButton = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+            (width / 3) - BOARD_PADDING * 2, 50
+        )
+        buttonText = mediumFont.render("AI Move", True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = aiButton.center
+        pygame.draw.rect(screen, WHITE, aiButton)
+        screen.blit(buttonText, buttonRect)
+
+        # Reset button
+        resetButton = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+            (width / 3) - BOARD_PADDING * 2, 50
+        )
+        buttonText = mediumFont.render("Reset", True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = resetButton.center
+        pygame.draw.rect(screen, WHITE, resetButton)
+        screen.blit(buttonText, buttonRect)
+
+        # Auto-play button
+        autoButton = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 90,
+            (width / 3) - BOARD_PADDING * 2, 50
+        )
+        buttonText = mediumFont.render("Stop" if autoplay else "Auto Play", True, BLACK)
+        buttonRect = buttonText.get_rect()
+        buttonRect.center = autoButton.center
+        pygame.draw.rect(screen, WHITE, autoButton)
+        screen.blit(buttonText, buttonRect)
+
+        # Display text
+        status = game.status()
+        text = "Lost" if lost or status == Environment.LOST else "Won" if status == Environment.WON else ""
+        text = mediumFont.render(text, True, WHITE)
+        textRect = text.get_rect()
+        textRect.center = ((5 / 6) * width, (2 / 3) * height)
+        screen.blit(text, textRect)
+
+        # Show that the AI is still working through what it was sent
+        if solver.thinking:
+            text = smallFont.render("Thinking...", True, WHITE)
+            textRect = text.get_rect()
+            textRect.center = ((5 / 6) * width, (2 / 3) * height + 40)
+            screen.blit(text, textRect)
+
+        # If AI button clicked, ask the AI for a move; the auto-play button starts or stops auto-play
+        for mouse in clicks:
+            if aiButton.collidepoint(mouse) and not lost:
+                solver.request_move()
+            elif autoButton.collidepoint(mouse) and not lost:
+                autoplay = not autoplay
+
+        # Play the moves the AI has chosen. In auto-play it is asked for the next move as soon as one is played, and
+        # moves are waited for until the end of the frame at most (MOVES_PER_FRAME moves, or as many as fit in one
+        # frame), so the agent plays at its own pace while the window keeps its frame rate; auto-play stops once the
+        # game is over
+        deadline = time.perf_counter() + 1 / FPS
+        played = 0
+        while not MOVES_PER_FRAME or played < MOVES_PER_FRAME:
+            if autoplay:
+                solver.request_move()
+            result = solver.result(timeout=deadline - time.perf_counter() if autoplay else 0)
+            if result is None:
+                break
+            more = ai_move(result)
+            played += 1
+            if not autoplay:
+                break
+            autoplay = more and game.status() == Environment.IN_PROGRESS
+
+        # Reset game state
+        if any(resetButton.collidepoint(mouse) for mouse in clicks):
+            solver.stop()
+            games += 1
+            game, solver = new_game()
+            lost = False
+            autoplay = False
+            renderer.reset()
+            continue
+
+        # Check for a right-click to toggle flagging
+        for mouse in rightClicks:
+            cell = renderer.cell_at(mouse)
+            if cell is not None and cell not in game.revealed and not lost:
+                game.toggle_flag(cell)
+
+        # User-made move: reveal the clicked cell and update AI knowledge
+        for mouse in clicks:
+            cell = renderer.cell_at(mouse)
+            if cell is not None and cell not in game.flags and cell not in game.revealed and not lost:
+                make_move(cell)
+
+        pygame.display.flip()
+        clock.tick(FPS)
+
+
+def play_headless(agent, height=10, width=10, mines=15, seed=None, games=1, tracer=None):
+    """
+    Plays games without a window through Simulation.play_game and prints a report
+    """
+    results = []
+    start = time.perf_counter()
+    for i in range(games):
+        results.append(Simulation.play_game(Simulation.AGENTS[agent], height, width, mines,
+                                            None if seed is None else seed + i, agent_options={"trace": tracer}))
+    Simulation.report(agent, Simulation.summarize(results, time.perf_counter() - start))
+
+
+def window_size(text):
+    """
+    Parse a window size written as WIDTHxHEIGHT, e.g. 1050x700
+    """
+    try:
+        width, height = (int(value) for value in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"window size must be WIDTHxHEIGHT, not {text!r}")
+    return width, height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Minesweeper with an AI agent, in a window or headlessly")
+    parser.add_argument("--agent", choices=sorted(Simulation.AGENTS), default="improved")
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--mines", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=None, help="seed of the first game (default: a random board)")
+    parser.add_argument("--window", type=window_size, default=(1050, 700), help="window size as WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--moves-per-frame", type=int, default=None,
+                        help="moves the agent makes each frame in auto-play (default: as many as fit in a frame)")
+    parser.add_argument("--auto", action="store_true", help="skip the instructions and let the agent play on its own")
+    parser.add_argument("--headless", action="store_true", help="play without a window and print a report")
+    parser.add_argument("--games", type=int, default=1, help="games to play with --headless")
+    parser.add_argument("--trace", choices=sorted(Trace.LEVELS), default=None,
+                        help="off, a summary line per move and game, or a JSON event per move "
+                             "(default: summary in a window, off headlessly)")
+    parser.add_argument("--trace-file", default=None, help="write the trace to this file instead of the terminal")
+    args = parser.parse_args(argv)
+
+    tracer = Trace.Tracer(args.trace or ("off" if args.headless else "summary"), args.trace_file)
+    if args.headless:
+        play_headless(args.agent, args.height, args.width, args.mines, args.seed, args.games, tracer)
+        tracer.close()
+    else:
+        play_window(args.agent, args.height, args.width, args.mines, args.seed, args.window, args.fps,
+                    args.moves_per_frame, args.auto, tracer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import FrontierSolver
+import KnowledgeBase
+
+
+class ProbabilityGuesser():
+    """
+    Picks the hidden cell least likely to be a mine when an agent has no safe move.
+    Frontier cells (hidden cells that appear in a clue) get their probability from the solutions of their component,
+    and the other hidden cells share the density of the mines that are left over. Solved components are cached by the
+    solver, so a guess only solves the components whose clues changed since the previous guess.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = solver or FrontierSolver.Solver()
+
+    def guess(self, agent):
+        """
+        Returns the lowest risk cell for the agent to reveal, or None if every cell has been revealed or flagged
+        """
+        available = agent.availableCells  # cells not revealed and not known to be mines
+        if not available:
+            return None
+
+        # Keep only the hidden cells of each clue: known mines lower its count, revealed cells just drop out
+        clues = KnowledgeBase.KnowledgeBase()
+        for clue in agent.knowledgeBase:
+            for cell in [cell for cell in clue.cells if cell not in available]:
+                clue = clue.WithMine(cell) if cell in agent.mineSet else clue.WithSafe(cell)
+            if len(clue):
+                clues.add(clue)
+
+        frontier = set(clues.cellIndex)
+        interior = len(available) - len(frontier)
+        remaining = None if agent.mines is None else agent.mines - len(agent.mineSet)
+
+        probabilities, interiorProbability = FrontierSolver.mineProbabilities(
+            self.solver.components(clues), remaining, interior)
+        if not probabilities and interiorProbability is None:
+            # the clues can not all hold, so fall back to a uniform guess
+            return available.choice()
+
+        best = min(probabilities.values(), default=None)
+        if interior and interiorProbability is not None and (best is None or interiorProbability < best):
+            return available.choiceExcluding(frontier)
+
+        # break ties between equally likely frontier cells at random
+        candidates = sorted(cell for cell, probability in probabilities.items() if probability - best < 1e-12)
+        return agent.rng.choice(candidates)
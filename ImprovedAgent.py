@@ -1,7 +1,12 @@
 import itertools
 import random
+import CellPool
 import Clue
+import Guesser
 import Environment
+import KnowledgeBase
+import Stats
+import Trace
 
 
 class ImprovedAgent():
@@ -9,36 +14,72 @@ class ImprovedAgent():
     This improved agent uses inference based prediction approach to solving the board
     """
 
-    def __init__(self, height=50, width=50):
+    def __init__(self, height=50, width=50, mines=None, guessing="uniform", trace=None,
+                 seed=None, stats=False, sparse=False):
 
         # Initialize the dimensions of the board,set the height and width
         self.height = height
         self.width = width
+        self.mines = mines  # total number of mines on the board, if it is known
+
+        # How to pick a cell when no safe move is known: "uniform" at random, or "probability" for the cell least likely
+        # to be a mine (see Guesser.ProbabilityGuesser)
+        self.guesser = Guesser.ProbabilityGuesser() if guessing == "probability" else None
+
+        # Where moves are reported, see Trace.Tracer; tracing is off unless a tracer is given
+        self.trace = trace or Trace.Tracer()
+
+        # Random moves are drawn from the agent's own random number generator, so a seed reproduces them
+        self.rng = random.Random(seed)
+
+        # Counters of the work done in this game and time per phase (see Stats.AgentStats), None unless stats=True
+        self.stats = None
+        if stats:
+            self.stats = Stats.AgentStats()
+            self.stats.attach(self)
 
         self.track_moves = set()  # Keep a track of the moves which have been made
-        self.total_cells = set()  # as well as a set of all board cells -> total cells
-        for x in range(height):
-            for y in range(width):
-                self.total_cells.add((x, y))  # adds all locations (x,y) into all cells
+        # as well as a pool of the board cells that are still available to move to: not revealed and not known to be
+        # mines. It is updated as cells are revealed or flagged, so a random move needs no set difference. For very
+        # large boards, sparse=True stores only the cells that left the pool instead, see CellPool.SparseCellPool
+        if sparse:
+            self.availableCells = CellPool.SparseCellPool(height, width, self.rng)
+        else:
+            self.availableCells = CellPool.CellPool(((x, y) for x in range(height) for y in range(width)), self.rng)
 
         # Keep track of cells known to be safe or mines
         self.mineSet = set()  # keep a track of the board cells known to be mines
         self.safeSet = set()  # keep a track of the board cells known to be safes
+        self.safeMoves = set()  # and of the ones among them that have not been moved to yet
 
-        # List of clues (set of cells and count of how many are mines)
-        self.knowledgeBase = []
+        # Clues (set of cells and count of how many are mines), without duplicates and indexed by cell
+        self.knowledgeBase = KnowledgeBase.KnowledgeBase()
         # Example knowledge base: [((set of cells) = count), ((set2 of cells) = count), ((set3 of cells) = count)]
 
+        # Clues that were added or changed since newInferences last ran. Only these can produce new inferences, so they
+        # are the only ones that get compared against the clues they share a cell with
+        self.changedClues = {}
+        # Worklist of clues that were added or changed since updateKnowledgeBase last ran. Only these can have become
+        # fully safe or fully mined
+        self.pendingClues = {}
+
     def MarkMine(self, cell):
         """
         Add the cell to the set of board cells known to be mines.
         For each clue in the knowledge base, mark the cell as a mine as well.
         This updates the cell as a mine in the total knowledge base.
         """
+        if self.stats is not None:
+            self.stats.markMine += 1
         counter = 0
         self.mineSet.add(cell)
-        for clue in self.knowledgeBase:
-            counter = counter + clue.MarkMine(cell)
+        self.availableCells.discard(cell)
+        self.safeMoves.discard(cell)
+        # Only the clues that contain the cell are affected; each is replaced by the clue without the cell
+        for clue in self.knowledgeBase.cluesWith(cell):
+            self.removeClues([clue])
+            self.addClue(clue.WithMine(cell))
+            counter = counter + 1
         return counter
 
     def MarkSafe(self, cell):
@@ -47,12 +88,47 @@ class ImprovedAgent():
         For each clue in the knowledge base, mark the cell as a safe as well.
         This updates the cell as a safe in the total knowledge base.
         """
+        if self.stats is not None:
+            self.stats.markSafe += 1
         counter = 0
         self.safeSet.add(cell)
-        for clue in self.knowledgeBase:
-            counter = counter + clue.MarkSafe(cell)
+        if cell not in self.track_moves and cell not in self.mineSet:
+            self.safeMoves.add(cell)
+        # Only the clues that contain the cell are affected; each is replaced by the clue without the cell
+        for clue in self.knowledgeBase.cluesWith(cell):
+            self.removeClues([clue])
+            self.addClue(clue.WithSafe(cell))
+            counter = counter + 1
         return counter
 
+    def addClue(self, clue):
+        """
+        Add a clue to the knowledge base, unless an equal clue is already there.
+        Cells that are already known to be safe or mines are taken out of the clue first, since they will not be
+        marked again, and a clue left without cells is resolved and not kept at all
+        """
+        for cell in clue.cells & self.mineSet:
+            clue = clue.WithMine(cell)
+        for cell in clue.cells & self.safeSet:
+            clue = clue.WithSafe(cell)
+        if len(clue) == 0:
+            return
+
+        if self.knowledgeBase.add(clue):
+            self.changedClues[clue] = None
+            self.pendingClues[clue] = None
+        elif self.stats is not None:
+            self.stats.duplicates += 1
+
+    def removeClues(self, clues):
+        """
+        Remove the given clues from the knowledge base
+        """
+        for clue in clues:
+            self.knowledgeBase.discard(clue)
+            self.changedClues.pop(clue, None)
+            self.pendingClues.pop(clue, None)
+
     def add_knowledge(self, cell, count):
         """
         The knowledge base is updated based on how many mines surround a safe cell (the clue)
@@ -61,8 +137,37 @@ class ImprovedAgent():
         mark any other cell as safe or mine that can be inferred using basic inference techniques, and finally update
         the knowledge base with any new clues that can be inferred.
         """
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, observations):
+        """
+        Add the knowledge of several revealed cells at once, e.g. the (cell, count) pairs returned by
+        Environment.reveal when a zero clue opens up a region of the board, or the moves of a recorded game.
+        Each clue is added and the cells it determines are marked through the worklist, which is cheap, and the subset
+        inferences are drawn once at the end. This reaches the same safe and mine cells as adding the clues one at a
+        time with add_knowledge without redoing the inference work for each of them.
+        """
+        observations = list(observations)
+        for cell, count in observations:
+            self.addObservation(cell, count)
+            self.updateKnowledgeBase()
+
+        self.drawInferences()
+
+        # Report the moves; nothing is formatted unless tracing is on
+        if self.trace.level >= Trace.SUMMARY:
+            for cell, count in observations:
+                self.traceMove(cell, count)
+
+    def addObservation(self, cell, count):
+        """
+        Record that a cell was revealed with the given clue: add it to the moves that have been made, mark it as safe
+        and add the clue on its neighbours to the knowledge base, without drawing any inference yet
+        """
         # add cell to list of moves that have been made
         self.track_moves.add(cell)
+        self.availableCells.discard(cell)
+        self.safeMoves.discard(cell)
 
         # add cell to list of safe cells
         self.MarkSafe(cell)
@@ -80,80 +185,73 @@ class ImprovedAgent():
                     neighboringCells.add((row, col)) # add cell to set of neighboring cells
 
         # add the clue to the knowledge base, each clue is represented by a set of cells as well as a count
-        self.knowledgeBase.append(Clue.Clue(neighboringCells, count))
+        self.addClue(Clue.Clue(neighboringCells, count))
 
+    def traceMove(self, cell, count):
+        """
+        Report a move to the tracer: a one line summary, or at the EVENTS level the full knowledge base and the safe and
+        mine cells as a structured event
+        """
+        if self.trace.level >= Trace.EVENTS:
+            self.trace.event("move", agent=type(self).__name__, cell=cell, count=count,
+                             knowledgeBase=Trace.clues(self.knowledgeBase), safe=sorted(self.safeSet),
+                             mines=sorted(self.mineSet))
+        else:
+            self.trace.summary(f"Move {cell}: {count} neighbouring mines, {len(self.knowledgeBase)} clues, "
+                               f"{len(self.safeSet)} safe, {len(self.mineSet)} mines")
+
+    def drawInferences(self):
+        """
+        Mark the cells that the knowledge base determines and add new inferences to it, until no new inference can be
+        drawn
+        """
         # call the update knowledge base function, which marks additional cells as either safe cells or mine cells
         self.updateKnowledgeBase()
 
         inferences = self.newInferences()
+        rounds = 1
 
         while inferences:
             for clue in inferences:
-                self.knowledgeBase.append(clue)
+                self.addClue(clue)
 
             # call the update knowledge base function, which marks additional cells as either safe cells or mine cells
             self.updateKnowledgeBase()
 
             inferences = self.newInferences()
-        print("\nMove: ", cell)
-
-        while self.SimplifyKnowledgeBase() != self.knowledgeBase:
-            pass
-
-    def SimplifyKnowledgeBase(self):
-        """
-        Make a copy of the current knowledge base and iterate through each clue. For each clue, retrieve the known safes
-        & known mines. Iterate through each set, and update it with the union of both and remove it from the knowledge
-        base.
-        """
-
-        # make a copy of the current knowledge base
-        GoThroughClues = self.knowledgeBase.copy()
+            rounds += 1
 
-        for clue in GoThroughClues:  # Queries all the clues in the knowledge base
-            # call known_safes function from the Clue class, returns set of safe cells and stores in known_safes
-            SafesQueried = clue.SafesKnown()
-            # call known_mines function from the Clue class, returns set of mine cells and stores in known_mines
-            MinesQueried = clue.MinesKnown()
-
-            if SafesQueried:
-                self.safeSet.update(SafesQueried)  # Add to safeSet
-                self.knowledgeBase.remove(clue)  # remove clue from the knowledge base
-
-            if MinesQueried:
-                self.knowledgeBase.remove(clue)  # remove clue from knowledge base
-                for mine in MinesQueried.union(self.mineSet):
-                    # if there is an overlap between known_mines and self.mines, mark the mine
-                    self.MarkMine(mine)
-
-        return self.knowledgeBase
+        if self.stats is not None:
+            self.stats.fixpointIterations += rounds
 
     def move_safely(self):
         """
-        Picks a safe move from the set of safe moves (safeSet) available to make. If there is not a safe move to be made
-        the function does not return anything
+        Picks a safe move from the safe cells that have not been moved to yet (safeMoves). If there is not a safe move
+        to be made the function does not return anything
         """
-        for move in self.safeSet:
-            if move not in self.track_moves and move not in self.mineSet:
-                self.print()
-                return move
-            else:
-                print("No safe moves available :(")
+        for move in self.safeMoves:
+            return move
+        if self.trace.level >= Trace.SUMMARY:
+            self.trace.summary("No safe moves available :(")
         return None
 
     def move_randomly(self):
         """
-        Picks a random move from the set of moves that are available to make (total board cells - moves that have
+        Picks a random move from the pool of moves that are available to make (total board cells - moves that have
         already been made - moves that have been identified as mines). If there is not a random move, available moves ≤ 0
         to be made the function does not return anything
+        With probability guessing the move is instead the available cell least likely to be a mine
         """
-        availableMoves = self.total_cells - self.track_moves - self.mineSet  # makes a move that has not already been made and is known to not be a mine
-        if len(availableMoves) > 0:
-            return random.choice(tuple(availableMoves))
-        else:
-            return None
+        if self.guesser is not None:
+            return self.guesser.guess(self)
+        # makes a move that has not already been made and is known to not be a mine, None if the pool is empty
+        return self.availableCells.choice()
 
     def print(self):
+        """
+        Print the whole knowledge base and the safe and mine cells; not called by the agent itself, use a tracer to
+        follow a game
+        """
         print("\n\n\n")
         print("------------------------------------------------------------------")
         print("KnowledgeBase: ")
@@ -168,61 +266,65 @@ class ImprovedAgent():
 
     def newInferences(self):
         """
-        For each clue in the knowledge base: add it to the list of removed clues if it does not contain any cells
-        Choose another clue from the knowledge base, check if it is empty (add to list of removed clues if it is)
-        Make sure the two clues are different from one another and if the list of cells in the clues overlap(using
-        subset). If it is a subset, then inferences can be drawn. Finally, remove any clues that are empty sets
+        For each clue that was added or changed since the last call, look up, through the cell index, the clues that
+        share at least one cell with it; only those can be a subset or a superset of it. For each such pair of different
+        clues, if one is a subset of the other then the difference of the two is a new inference. Pairs of unchanged
+        clues were already compared on an earlier call, so the work done depends on the clues that just changed, not on
+        the size of the knowledge base
         """
 
-        inferences = []  # maintain a list of inferences
-        removeClue = []  # maintain a list of clues to remove
+        inferences = {}  # maintain the inferences, as dictionary keys so that each one is only drawn once
 
-        for clue1 in self.knowledgeBase:
-            # mark for removal if it is empty
-            if clue1.cells == set():
-                removeClue.append(clue1)
-                continue
-            for clue2 in self.knowledgeBase:
-                if clue2.cells == set():
-                    removeClue.append(clue2)
-                    continue
-                if clue1 != clue2:  # make sure the clues are different from one another
-                    if clue2.cells.issubset(clue1.cells):  # if s2 is a subset of s1
-                        compareCells = clue1.cells.difference(clue2.cells)
-                        compareCount = clue1.count - clue2.count
-                        new_inference = Clue.Clue(compareCells, compareCount)
-                        if new_inference not in self.knowledgeBase:
-                            inferences.append(new_inference)
+        changed = list(self.changedClues)
+        self.changedClues = {}
 
-        # remove sentences without any cells
-        self.knowledgeBase = [clues for clues in self.knowledgeBase if clues not in removeClue]
-        return inferences
+        comparisons = 0
+        firstSubsets = 0  # pairs settled by the first subset check
+        duplicates = 0
+
+        for clue1 in changed:
+            # compare with every clue that shares a cell with clue1
+            neighbours = self.knowledgeBase.neighbours(clue1)
+            comparisons += len(neighbours) - (clue1 in self.knowledgeBase)
+            for clue2 in neighbours:
+                if clue1 != clue2:  # make sure the clues are different from one another
+                    if clue2.IsSubset(clue1):  # if s2 is a subset of s1
+                        new_inference = clue1.Difference(clue2)
+                        firstSubsets += 1
+                    elif clue1.IsSubset(clue2):  # if s1 is a subset of s2
+                        new_inference = clue2.Difference(clue1)
+                    else:
+                        continue
+                    if new_inference not in self.knowledgeBase:
+                        inferences[new_inference] = None
+                    else:
+                        duplicates += 1
+
+        if self.stats is not None:
+            self.stats.comparisons += comparisons
+            self.stats.subsetChecks += 2 * comparisons - firstSubsets
+            self.stats.inferences += len(inferences)
+            self.stats.duplicates += duplicates
+        return list(inferences)
 
     def updateKnowledgeBase(self):
         """
         This function marks additional cells as mines or safes.
+        It works through the clues that were added or changed since it last ran. Marking a cell updates only the clues
+        that contain it and puts them back on the worklist, so each newly determined cell costs work proportional to
+        the number of clues it appears in rather than a pass over the whole knowledge base.
         """
-        count = 1
-        while count:
-            count = 0
-            # Iterate through all the clues within the knowledge base
-            for clue in self.knowledgeBase:
-                # Iterate through all the cells for the safes known within a clue
-                for cell in clue.SafesKnown():  # calls the SafesKnown function from the Clue class
-                    # Mark the cell as safe and update the count
-                    self.MarkSafe(cell)
-                    count += 1
-                for cell in clue.MinesKnown():  # calls the MinesKnown function from the Clue class
-                    # Mark the cell as a mine and update the count
-                    self.MarkMine(cell)
-                    count += 1
-            # Iterate through all the cells from the set of safe cells
-            for cell in self.safeSet:
-                count += self.MarkSafe(cell)
-
-            # Iterate through all the cells from the set of mine cells
-            for cell in self.mineSet:
-                count += self.MarkMine(cell)
+        examined = 0
+        while self.pendingClues:
+            clue, _ = self.pendingClues.popitem()
+            examined += 1
+            # Iterate through all the cells for the safes known within a clue
+            for cell in clue.SafesKnown():  # calls the SafesKnown function from the Clue class
+                self.MarkSafe(cell)
+            for cell in clue.MinesKnown():  # calls the MinesKnown function from the Clue class
+                self.MarkMine(cell)
+        if self.stats is not None:
+            self.stats.cluesExamined += examined
 
     def FlagCells(self):
         """
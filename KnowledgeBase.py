@@ -0,0 +1,68 @@
+class KnowledgeBase():
+    """
+    The clues an agent knows, kept without duplicates.
+    Clues are stored as the keys of a dictionary, which gives constant time insertion, removal and membership checks
+    while iterating in the order the clues were added. An index from every cell to the clues that contain it lets the
+    agents find the clues affected by a cell without going through the whole knowledge base.
+    Stored clues must not be changed in place; remove the clue and add its updated version instead.
+    """
+
+    def __init__(self, clues=()):
+        self.clues = {}  # clue -> None, used as an ordered set
+        self.cellIndex = {}  # cell -> {clue: None} for every clue that contains the cell
+        for clue in clues:
+            self.add(clue)
+
+    def add(self, clue):
+        """
+        Add a clue to the knowledge base. Returns False, and leaves the knowledge base unchanged, if an equal clue is
+        already known
+        """
+        if clue in self.clues:
+            return False
+        self.clues[clue] = None
+        for cell in clue.cells:
+            self.cellIndex.setdefault(cell, {})[clue] = None
+        return True
+
+    def remove(self, clue):
+        """
+        Remove a clue from the knowledge base, raising KeyError if it is not there
+        """
+        del self.clues[clue]
+        for cell in clue.cells:
+            entry = self.cellIndex[cell]
+            del entry[clue]
+            if not entry:
+                del self.cellIndex[cell]
+
+    def discard(self, clue):
+        """
+        Remove a clue from the knowledge base if it is there
+        """
+        if clue in self.clues:
+            self.remove(clue)
+
+    def cluesWith(self, cell):
+        """
+        Returns a list of the clues that contain the given cell
+        """
+        return list(self.cellIndex.get(cell, ()))
+
+    def neighbours(self, clue):
+        """
+        Returns the clues that share at least one cell with the given clue, including the clue itself if it is stored
+        """
+        neighbours = {}
+        for cell in clue.cells:
+            neighbours.update(self.cellIndex.get(cell, {}))
+        return list(neighbours)
+
+    def __contains__(self, clue):
+        return clue in self.clues
+
+    def __iter__(self):
+        return iter(self.clues)
+
+    def __len__(self):
+        return len(self.clues)
@@ -0,0 +1,121 @@
+import pygame
+
+# Colors
+BLACK = (0, 0, 0)
+GRAY = (180, 180, 180)
+WHITE = (255, 255, 255)
+
+
+class BoardRenderer():
+    """
+    Draws the Minesweeper board for the gameplay scripts.
+    The board is kept on its own surface that persists between frames. Each frame, only the cells whose state
+    (hidden, number, flag or mine) changed since the previous frame are redrawn onto it, and the whole surface is then
+    copied to the screen in one blit. The cell rectangles and the images of the digits 0 to 8 are built once.
+    """
+
+    def __init__(self, height, width, cell_size, board_origin, font, flag, mine):
+        self.height = height
+        self.width = width
+        self.cell_size = cell_size
+        self.board_origin = board_origin
+        self.flag = flag
+        self.mine = mine
+
+        # Rectangle of every cell on the board surface, built once
+        self.rects = [
+            [pygame.Rect(j * cell_size, i * cell_size, cell_size, cell_size) for j in range(width)]
+            for i in range(height)
+        ]
+
+        # The clue of a revealed cell is always one of the digits 0 to 8, so each is rendered only once
+        self.digits = [font.render(str(count), True, BLACK) for count in range(9)]
+
+        self.surface = pygame.Surface((width * cell_size, height * cell_size))
+        self.reset()
+
+    def reset(self):
+        """
+        Forget what was drawn and redraw every cell as hidden, e.g. when a new game starts
+        """
+        self.states = {}  # cell -> state it was last drawn in, for cells that are not hidden
+        self.revealed = set()
+        self.flags = set()
+        self.triggered = set()
+        self.lost = False
+        for i in range(self.height):
+            for j in range(self.width):
+                self.drawCell((i, j), None)
+
+    def cell_at(self, pos):
+        """
+        Returns the (row, column) of the cell under a screen position, or None if the position is off the board
+        """
+        x = pos[0] - self.board_origin[0]
+        y = pos[1] - self.board_origin[1]
+        if x < 0 or y < 0:
+            return None
+        i, j = int(y // self.cell_size), int(x // self.cell_size)
+        if i >= self.height or j >= self.width:
+            return None
+        return (i, j)
+
+    def state(self, game, cell, lost):
+        """
+        Returns what a cell should show: "mine", "flag", its clue as an int, or None if it is hidden
+        """
+        if lost and game.is_mine(cell):
+            return "mine"
+        elif cell in game.flags:
+            # display triggered mine
+            return "mine" if cell in game.triggered else "flag"
+        elif cell in game.revealed:
+            return game.mineNeighbor(cell)
+        return None
+
+    def drawCell(self, cell, state):
+        """
+        Draw one cell onto the board surface
+        """
+        i, j = cell
+        rect = self.rects[i][j]
+        pygame.draw.rect(self.surface, GRAY, rect)
+        pygame.draw.rect(self.surface, WHITE, rect, 3)
+
+        if state == "mine":
+            self.surface.blit(self.mine, rect)
+        elif state == "flag":
+            self.surface.blit(self.flag, rect)
+        elif state is not None:
+            neighbors = self.digits[state]
+            neighborsTextRect = neighbors.get_rect()
+            neighborsTextRect.center = rect.center
+            self.surface.blit(neighbors, neighborsTextRect)
+
+        if state is None:
+            self.states.pop(cell, None)
+        else:
+            self.states[cell] = state
+
+    def draw(self, screen, game, lost=False):
+        """
+        Bring the board surface up to date with the game and copy it to the screen
+        """
+        if lost != self.lost:
+            # every mine appears or disappears, redraw the whole board
+            dirty = [(i, j) for i in range(self.height) for j in range(self.width)]
+            self.lost = lost
+        else:
+            # only cells that were revealed, flagged, unflagged or triggered since the last frame can have changed
+            dirty = (game.revealed ^ self.revealed) | (game.flags ^ self.flags) | (game.triggered ^ self.triggered)
+
+        if dirty:
+            for cell in dirty:
+                state = self.state(game, cell, lost)
+                if self.states.get(cell) != state:
+                    self.drawCell(cell, state)
+            self.revealed = set(game.revealed)
+            self.flags = set(game.flags)
+            self.triggered = set(game.triggered)
+
+        screen.blit(self.surface, self.board_origin)
@@ -0,0 +1,189 @@
+import argparse
+import random
+import time
+
+import BasicAgent
+import BoardCorpus
+import CSPAgent
+import Environment
+import ImprovedAgent
+import Stats
+import Trace
+
+# Agents that can be driven by the headless runner, keyed by the name used on the command line
+AGENTS = {
+    "basic": BasicAgent.BasicAgent,
+    "improved": ImprovedAgent.ImprovedAgent,
+    "csp": CSPAgent.CSPAgent,
+}
+
+# Board representations the runner can play on: the original list of lists, the NumPy backed board, or a bitmap of the
+# mines for very large boards
+ENVIRONMENTS = {
+    "list": Environment.Environment,
+    "array": Environment.ArrayEnvironment,
+    "bitmap": Environment.BitmapEnvironment,
+}
+
+
+def game_seeds(seed):
+    """
+    Returns the seeds of the board and of the agent for a game seed, or None for both if the game is not seeded.
+    The board is seeded with the game seed itself and the agent with a number drawn from it, so that the agent's random
+    moves do not follow the same sequence of random numbers that placed the mines.
+    """
+    if seed is None:
+        return None, None
+    return seed, random.Random(seed).getrandbits(64)
+
+
+def play_game(agent_class, height=10, width=10, mines=15, seed=None, environment_class=Environment.Environment,
+              agent_options=None, board=None):
+    """
+    Plays one complete game headlessly, without pygame, and returns a dictionary describing the outcome.
+    The game follows the same rules as the gameplay scripts: the agent makes a safe move if it knows one and a random
+    move otherwise, a triggered mine is marked as a mine for the agent and the game carries on, and the game is over
+    once Environment.status says so (every safe cell revealed) or the agent has no moves left to make. Revealing a cell
+    with no neighbouring mines also reveals the region around it, as in the usual game.
+    agent_options are extra keyword arguments for the agent, e.g. {"guessing": "probability"}; a "trace" option is also
+    used to report the outcome of the game.
+    The board and the agent's random moves are reproducible from the seed. A board (2D boolean mine mask, e.g. from a
+    BoardCorpus) can be given instead of generating one, and then only the agent is seeded.
+    """
+    boardSeed, agentSeed = game_seeds(seed)
+    if board is None:
+        game = environment_class(height=height, width=width, mines=mines, seed=boardSeed)
+    else:
+        game = environment_class.from_mask(board)
+        height, width, mines = game.height, game.width, game.mineCount
+    ai = agent_class(height=height, width=width, mines=mines, seed=agentSeed, **(agent_options or {}))
+
+    moves = 0
+
+    while game.status() == Environment.IN_PROGRESS:
+        move = ai.move_safely()
+        if move is None:
+            move = ai.move_randomly()
+            if move is None:
+                break  # no moves left to make
+        moves += 1
+
+        if game.is_mine(move):
+            game.reveal(move)  # records the triggered mine
+            ai.MarkMine(move)
+            if ai.trace.level >= Trace.SUMMARY:
+                ai.trace.summary(f"Mine triggered at {move}")
+        else:
+            # a zero clue reveals its whole region at once, the agent takes in every revealed cell together
+            ai.add_knowledge_batch(game.reveal(move))
+
+    # every mine that was not stepped on is either flagged by the agent or left hidden once all safe cells are revealed
+    result = {
+        "won": game.status() == Environment.WON,
+        "moves": moves,
+        "mines": game.mineCount,
+        "mines_triggered": len(game.triggered),
+        "mines_identified": game.mineCount - len(game.triggered),
+    }
+    if ai.stats is not None:
+        result["stats"] = ai.stats.as_dict()
+    if ai.trace.level >= Trace.EVENTS:
+        ai.trace.event("game", seed=seed, **result)
+    elif ai.trace.level >= Trace.SUMMARY:
+        ai.trace.summary(f"Game {seed}: {'won' if result['won'] else 'lost'}, {moves} moves, "
+                         f"{result['mines_identified']}/{result['mines']} mines safely identified")
+    return result
+
+
+def run_batch(agent_class, games=100, height=10, width=10, mines=15, seed=0,
+              environment_class=Environment.Environment, agent_options=None, corpus=None):
+    """
+    Plays a number of complete games with one agent and returns the aggregated results.
+    Game i is played with seed + i, so a batch is reproducible from its starting seed. With a corpus (see BoardCorpus)
+    game i is played on its board i instead, cycling through the corpus if there are more games than boards.
+    """
+    results = []
+    start = time.perf_counter()
+    for i in range(games):
+        board = None if corpus is None else corpus[i % len(corpus)]
+        results.append(play_game(agent_class, height, width, mines, seed + i, environment_class, agent_options, board))
+    elapsed = time.perf_counter() - start
+    return summarize(results, elapsed)
+
+
+def summarize(results, elapsed):
+    """
+    Aggregates the per-game dictionaries returned by play_game into win rate, mines safely identified and throughput,
+    and adds up the agents' counters if the games were played with stats=True
+    """
+    games = len(results)
+    total_mines = sum(result["mines"] for result in results)
+    summary = {
+        "games": games,
+        "wins": sum(result["won"] for result in results),
+        "win_rate": sum(result["won"] for result in results) / games if games else 0.0,
+        "mines_identified": sum(result["mines_identified"] for result in results),
+        "mines_identified_rate": (sum(result["mines_identified"] for result in results) / total_mines
+                                  if total_mines else 0.0),
+        "moves": sum(result["moves"] for result in results),
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed > 0 else float("inf"),
+    }
+    if results and "stats" in results[0]:
+        summary["stats"] = Stats.total(result["stats"] for result in results)
+    return summary
+
+
+def report(name, summary):
+    """
+    Print a one line text report of a batch summary
+    """
+    print(f"{name:>10}: {summary['games']} games, "
+          f"win rate {summary['win_rate']:.1%}, "
+          f"mines safely identified {summary['mines_identified_rate']:.1%}, "
+          f"{summary['games_per_second']:.2f} games/s")
+    if "stats" in summary:
+        Stats.report(summary["stats"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play Minesweeper games headlessly and report agent performance")
+    parser.add_argument("--agent", choices=sorted(AGENTS) + ["all"], default="all")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--height", type=int, default=10)
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--mines", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--board", choices=sorted(ENVIRONMENTS), default="list")
+    parser.add_argument("--guessing", choices=["uniform", "probability"], default=None,
+                        help="how agents pick a cell when no safe move is known (default: the agent's own)")
+    parser.add_argument("--trace", choices=sorted(Trace.LEVELS), default="off",
+                        help="off, a summary line per move and game, or a JSON event per move")
+    parser.add_argument("--trace-file", default=None, help="write the trace to this file instead of the terminal")
+    parser.add_argument("--corpus", default=None,
+                        help="play the boards of this corpus file (see BoardCorpus.py) instead of random boards")
+    parser.add_argument("--stats", action="store_true",
+                        help="count the work the agents do (comparisons, inferences, ...) and time their phases")
+    parser.add_argument("--sparse", action="store_true",
+                        help="keep no per cell state in the agents, for very large boards (use with --board bitmap)")
+    args = parser.parse_args(argv)
+
+    corpus = None
+    if args.corpus:
+        corpus = BoardCorpus.BoardCorpus(args.corpus)
+
+    tracer = Trace.Tracer(args.trace, args.trace_file)
+    agent_options = {"trace": tracer, "stats": args.stats, "sparse": args.sparse}
+    if args.guessing:
+        agent_options["guessing"] = args.guessing
+
+    names = sorted(AGENTS) if args.agent == "all" else [args.agent]
+    for name in names:
+        summary = run_batch(AGENTS[name], args.games, args.height, args.width, args.mines, args.seed,
+                            ENVIRONMENTS[args.board], agent_options, corpus)
+        report(name, summary)
+    tracer.close()
+
+
+if __name__ == "__main__":
+    main()
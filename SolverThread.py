@@ -0,0 +1,105 @@
+import queue
+import threading
+
+import Trace
+
+
+class SolverThread(threading.Thread):
+    """
+    Runs an agent in a worker thread, so that the game window keeps drawing frames and handling events while the agent
+    draws its inferences.
+    The game loop sends what it learns through a queue: batches of revealed (cell, clue) pairs and triggered mines. When
+    it wants a move it sends a request, and the worker answers on a second queue with the chosen cell (None if there is
+    no move left) and a copy of the set of cells the agent knows to be mines. Requests are handled in the order they
+    were sent, so a move is always chosen knowing every cell revealed before it was asked for. Once the thread is
+    started only the worker touches the agent.
+    """
+
+    def __init__(self, agent):
+        super().__init__(daemon=True)
+        self.agent = agent
+        self.trace = agent.trace
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.waiting = False  # a move was asked for and has not been collected yet
+        self.pending = 0  # requests sent and not yet handled
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            kind, value = self.requests.get()
+            if kind == "stop":
+                return
+            if kind == "observe":
+                self.agent.add_knowledge_batch(value)
+            elif kind == "mine":
+                self.agent.MarkMine(value)
+            elif kind == "move":
+                self.results.put(self.choose())
+            with self.lock:
+                self.pending -= 1
+
+    def choose(self):
+        """
+        Pick the agent's next move, a safe one if it knows one
+        """
+        move = self.agent.move_safely()
+        if move is None:
+            move = self.agent.move_randomly()
+            message = "No moves left to make." if move is None else "No known safe moves, AI making random move."
+        else:
+            message = "AI making safe move."
+        if self.trace.level >= Trace.SUMMARY:
+            self.trace.summary(message)
+        return move, set(self.agent.FlagCells())
+
+    def send(self, kind, value=None):
+        with self.lock:
+            self.pending += 1
+        self.requests.put((kind, value))
+
+    def observe(self, observations):
+        """
+        Send revealed (cell, clue) pairs, e.g. the result of Environment.reveal
+        """
+        self.send("observe", observations)
+
+    def mine(self, cell):
+        """
+        Send a mine that was triggered
+        """
+        self.send("mine", cell)
+
+    def request_move(self):
+        """
+        Ask for the next move, unless one was already asked for and not collected
+        """
+        if not self.waiting:
+            self.waiting = True
+            self.send("move")
+
+    def result(self, timeout=0):
+        """
+        Returns (move, mines) for the move asked for, or None if it is not ready within timeout seconds
+        """
+        if not self.waiting:
+            return None
+        try:
+            result = self.results.get(timeout=timeout) if timeout > 0 else self.results.get_nowait()
+        except queue.Empty:
+            return None
+        self.waiting = False
+        return result
+
+    @property
+    def thinking(self):
+        """
+        Whether the agent is still working through what it was sent
+        """
+        return self.pending > 0
+
+    def stop(self):
+        """
+        Let the worker finish once it has handled the requests sent so far
+        """
+        self.requests.put(("stop", None))
@@ -0,0 +1,120 @@
+import time
+
+# Methods of the agents that are measured as phases, by AgentStats and by Benchmark.py, when the agent has them. Phases
+# nest, e.g. newInferences runs inside drawInferences, which runs inside add_knowledge_batch, and the time of a phase
+# includes the time of the phases it calls
+PHASES = [
+    "add_knowledge_batch",
+    "add_knowledge",
+    "addObservation",
+    "SimplifyKnowledgeBase",
+    "drawInferences",
+    "newInferences",
+    "updateKnowledgeBase",
+    "solveFrontier",
+    "MarkSafe",
+    "MarkMine",
+    "move_safely",
+    "move_randomly",
+]
+
+# Counters kept by AgentStats, in the order they are reported
+COUNTERS = [
+    "comparisons",  # pairs of different clues compared for a subset relation
+    "subsetChecks",  # IsSubset calls made for those pairs
+    "cluesExamined",  # clues checked for cells they determine as all safe or all mines
+    "inferences",  # new clues drawn from a clue and its subset
+    "duplicates",  # inferred or observed clues that were already in the knowledge base
+    "markSafe",  # MarkSafe calls
+    "markMine",  # MarkMine calls
+    "fixpointIterations",  # rounds of inference or simplification run until nothing changed
+]
+
+
+def wrapPhases(agent, wrap):
+    """
+    Replace each phase method of an agent, on the instance, with wrap(name, method). Since the wrapper is set on the
+    instance, the calls the agent makes to itself (self.newInferences() and so on) go through it too
+    """
+    for name in PHASES:
+        method = getattr(agent, name, None)
+        if method is not None:
+            setattr(agent, name, wrap(name, method))
+
+
+def timed(method, record):
+    """
+    Returns a version of method that passes the wall time of each call, in seconds, to record
+    """
+    def timedMethod(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record(time.perf_counter() - start)
+    return timedMethod
+
+
+class AgentStats():
+    """
+    Counts the work an agent does during one game, to find out why a game was slow without running a profiler.
+    An agent built with stats=True keeps one in self.stats. Otherwise self.stats is None and the phase methods are not
+    wrapped, so the agent only pays for an `is not None` test once per call of the counted methods. Counts found inside
+    loops are kept in local variables, or worked out from the sizes of what was looped over, and added once the loop is
+    done, so no loop ever touches the stats object.
+    """
+
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.phaseTime = {}  # phase -> wall time in seconds
+        self.phaseCalls = {}  # phase -> number of calls
+
+    def attach(self, agent):
+        """
+        Time the phases of an agent, by replacing its phase methods on the instance with timed versions
+        """
+        wrapPhases(agent, self.timed)
+
+    def timed(self, name, method):
+        self.phaseTime.setdefault(name, 0.0)
+        self.phaseCalls.setdefault(name, 0)
+
+        def record(seconds):
+            self.phaseTime[name] += seconds
+            self.phaseCalls[name] += 1
+        return timed(method, record)
+
+    def as_dict(self):
+        """
+        Returns the counters and the phase times (in seconds) as a dictionary, e.g. to add them to a game result
+        """
+        counts = {name: getattr(self, name) for name in COUNTERS}
+        counts["phaseTime"] = dict(self.phaseTime)
+        counts["phaseCalls"] = dict(self.phaseCalls)
+        return counts
+
+
+def total(stats):
+    """
+    Adds up dictionaries returned by AgentStats.as_dict, e.g. over the games of a batch
+    """
+    summed = {name: 0 for name in COUNTERS}
+    summed["phaseTime"] = {}
+    summed["phaseCalls"] = {}
+    for counts in stats:
+        for name in COUNTERS:
+            summed[name] += counts[name]
+        for key in ("phaseTime", "phaseCalls"):
+            for phase, value in counts[key].items():
+                summed[key][phase] = summed[key].get(phase, 0) + value
+    return summed
+
+
+def report(stats, indent="    "):
+    """
+    Print counters and phase times, as returned by as_dict or total
+    """
+    print(indent + ", ".join(f"{name} {stats[name]}" for name in COUNTERS))
+    for phase, seconds in sorted(stats["phaseTime"].items(), key=lambda item: -item[1]):
+        print(f"{indent}{phase:<22} {stats['phaseCalls'][phase]:>8} calls {seconds * 1000:>10.2f} ms")
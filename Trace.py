@@ -0,0 +1,53 @@
+import json
+import sys
+
+# Trace levels, from quietest to most detailed
+OFF = 0  # nothing is written
+SUMMARY = 1  # one short line of text per move and per game
+EVENTS = 2  # one JSON object per line for every move, including the full knowledge base
+
+LEVELS = {"off": OFF, "summary": SUMMARY, "events": EVENTS}
+
+
+class Tracer():
+    """
+    Where the agents and the game loops report what they are doing.
+    Callers check the level before building a message, e.g. `if self.trace.level >= Trace.SUMMARY:`, so a tracer that
+    is off costs one integer comparison per move. Summary lines are written as plain text; at the EVENTS level every
+    message is written as a JSON object on its own line so that a trace file can be loaded back for analysis.
+    """
+
+    def __init__(self, level=OFF, path=None, stream=None):
+        self.level = LEVELS[level] if isinstance(level, str) else level
+        self.path = path
+        if path is not None and self.level > OFF:
+            self.stream = open(path, "w")
+        else:
+            self.stream = stream or sys.stdout
+
+    def summary(self, message):
+        """
+        Write a line of text, or a "message" event when tracing events
+        """
+        if self.level >= EVENTS:
+            self.event("message", text=message)
+        elif self.level >= SUMMARY:
+            print(message, file=self.stream)
+
+    def event(self, kind, **fields):
+        """
+        Write a structured event; cells (tuples) and sets of cells are written as JSON lists
+        """
+        if self.level >= EVENTS:
+            self.stream.write(json.dumps(dict(event=kind, **fields), default=list) + "\n")
+
+    def close(self):
+        if self.path is not None and self.stream is not sys.stdout:
+            self.stream.close()
+
+
+def clues(knowledgeBase):
+    """
+    Returns the clues of a knowledge base as [[cells, count], ...], with the cells sorted, for an event
+    """
+    return [[sorted(clue.cells), clue.count] for clue in knowledgeBase]